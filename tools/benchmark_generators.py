@@ -0,0 +1,702 @@
+#!/usr/bin/python
+
+# Copyright (C) 2017 Belledonne Communications SARL
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+import argparse
+import gc
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from xml.sax.saxutils import escape
+
+import genapixml as CApi
+
+
+def snakeCase(name):
+	res = ''
+	first = True
+	for l in name:
+		if l.isupper() and not first:
+			res += '_'
+		res += l.lower()
+		first = False
+	return res
+
+
+def letterSuffix(i):
+	return chr(ord('A') + i % 26) + chr(ord('a') + (i // 26) % 26) + 'x' * (i // 676)
+
+
+class DoxygenSynthesizer:
+	"""Writes a Doxygen XML directory describing a fake API made of
+	nclasses classes of nmethods methods each, with their listener (Cbs)
+	classes, callbacks, enums, properties and bctbx_list_t return values."""
+
+	def __init__(self, nclasses, nmethods, nenums = None):
+		self.nclasses = nclasses
+		self.nmethods = nmethods
+		self.nenums = nenums if nenums is not None else max(1, nclasses // 2)
+		# The 'Item' and 'Type' suffixes prevent any name from ending with 'Cb'
+		self.classes = [ 'LinphoneObj' + letterSuffix(i) + 'Item' for i in range(nclasses) ]
+		if nclasses > 0:
+			# Classes whose name is prefixed by the name of another class
+			self.classes += [ self.classes[0] + 'Params', self.classes[0] + 'ParamsExt' ]
+		self.enums = [ 'LinphoneKind' + letterSuffix(i) + 'Type' for i in range(self.nenums) ]
+
+	def __header(self):
+		return "<?xml version='1.0' encoding='UTF-8' standalone='no'?>\n<doxygen version=\"1.8.13\">\n"
+
+	def __parameterList(self, params):
+		s = '<parameterlist kind="param">\n'
+		for t, n in params:
+			s += '<parameteritem>\n<parameternamelist>\n<parametername>{0}</parametername>\n</parameternamelist>\n'.format(n)
+			s += '<parameterdescription>\n<para>The {0} <ref refid="{0}" kindref="member">parameter</ref>. </para>\n</parameterdescription>\n</parameteritem>\n'.format(n)
+		s += '</parameterlist>\n'
+		return s
+
+	def __function(self, name, returnType, params, brief, returnDesc = None, containedType = None, deprecated = False, donotwrap = False, internal = False):
+		s = '<memberdef kind="function" id="{0}" prot="public" static="no" const="no" explicit="no" inline="no" virt="non-virtual">\n'.format(name)
+		s += '<type>{0}</type>\n<definition>{0} {1}</definition>\n<argsstring>()</argsstring>\n<name>{1}</name>\n'.format(escape(returnType), name)
+		for t, n in params:
+			s += '<param>\n<type>{0}</type>\n<declname>{1}</declname>\n</param>\n'.format(escape(t), n)
+		s += '<briefdescription>\n<para>{0} </para>\n</briefdescription>\n'.format(escape(brief))
+		s += '<detaileddescription>\n<para>Detailed description of <ref refid="{0}" kindref="member">{0}</ref>. '.format(name)
+		if len(params) > 0:
+			s += self.__parameterList(params)
+		if returnDesc is not None:
+			s += '<simplesect kind="return">\n<para>{0} '.format(escape(returnDesc))
+			if containedType is not None:
+				s += '<bctbxlist>{0}</bctbxlist> '.format(escape(containedType))
+			s += '</para>\n</simplesect>\n'
+		s += '<simplesect kind="see">\n<para>See <ref refid="other" kindref="member">other</ref> function. </para>\n</simplesect>\n'
+		s += '<simplesect kind="note">\n<para>A note. </para>\n</simplesect>\n'
+		if deprecated:
+			s += '<xrefsect id="deprecated_1">\n<xreftitle>Deprecated</xreftitle>\n<xrefdescription>\n<para>Use another function. </para>\n</xrefdescription>\n</xrefsect>\n'
+		if donotwrap:
+			s += '<donotwrap/>\n'
+		s += '</para>\n'
+		if internal:
+			s += '<internal>\n<para>Internal function. </para>\n</internal>\n'
+		s += '</detaileddescription>\n<inbodydescription>\n</inbodydescription>\n<location file="linphone/api/c-{0}.h" line="1" column="1"/>\n</memberdef>\n'.format(len(name) % 7)
+		return s
+
+	def __enum(self, name):
+		s = '<memberdef kind="enum" id="{0}" prot="public" static="no">\n<name>_{0}</name>\n'.format(name)
+		for v in range(5):
+			s += '<enumvalue id="{0}{1}" prot="public">\n<name>{0}Value{1}</name>\n'.format(name, letterSuffix(v))
+			if v == 0:
+				s += '<initializer>= 0</initializer>\n'
+			elif v == 3:
+				s += '<initializer>=1 &lt;&lt; 3</initializer>\n'
+			s += '<briefdescription>\n<para>Value {0} </para>\n</briefdescription>\n<detaileddescription>\n<para>About <ref refid="v" kindref="member">this</ref> value. </para>\n</detaileddescription>\n</enumvalue>\n'.format(v)
+		s += '<briefdescription>\n<para>Enum {0} </para>\n</briefdescription>\n<detaileddescription>\n<para>Enum details. </para>\n</detaileddescription>\n<location file="linphone/types.h" line="1" column="1"/>\n</memberdef>\n'.format(name)
+		return s
+
+	def __typedef(self, definition, name, brief, details = ''):
+		s = '<memberdef kind="typedef" id="{0}" prot="public" static="no">\n<type></type>\n<definition>typedef {1}</definition>\n<argsstring></argsstring>\n<name>{0}</name>\n'.format(name, escape(definition))
+		s += '<briefdescription>\n<para>{0} </para>\n</briefdescription>\n<detaileddescription>\n{1}</detaileddescription>\n<location file="linphone/types.h" line="1" column="1"/>\n</memberdef>\n'.format(escape(brief), details)
+		return s
+
+	def __group(self, index, className):
+		cbsName = className + 'Cbs'
+		prefix = snakeCase(className) + '_'
+		cbsPrefix = snakeCase(cbsName) + '_'
+		enumName = self.enums[index % len(self.enums)]
+		s = self.__header()
+		s += '<compounddef id="group__{0}" kind="group">\n<compoundname>{0}</compoundname>\n<title>{1}</title>\n'.format(prefix[:-1], className)
+		if index < len(self.enums):
+			s += '<sectiondef kind="enum">\n' + self.__enum(self.enums[index]) + '</sectiondef>\n'
+		s += '<sectiondef kind="typedef">\n'
+		if index < len(self.enums):
+			s += self.__typedef('enum _{0} {0}'.format(self.enums[index]), self.enums[index], 'Enum typedef')
+		s += self.__typedef('struct _{0} {0}'.format(className), className, 'Object ' + className, '<para>Details of {0}. </para>\n'.format(className))
+		s += self.__typedef('struct _{0} {0}'.format(cbsName), cbsName, 'Callbacks of ' + className)
+		events = []
+		for e in range(3):
+			event = 'Event' + letterSuffix(e) + 'Happened'
+			eventName = cbsName + event + 'Cb'
+			events.append((snakeCase(event), eventName))
+			params = [ (className + ' *', 'obj'), (enumName, 'value'), ('const char *', 'message') ]
+			s += self.__typedef('void(* {0}) ({1} *obj, {2} value, const char *message)'.format(eventName, className, enumName), eventName, 'Callback',
+				'<para>Called when something happens. ' + self.__parameterList(params) + '</para>\n')
+		s += '</sectiondef>\n<sectiondef kind="func">\n'
+		obj = className + ' *'
+		constObj = 'const ' + className + ' *'
+		s += self.__function(prefix + 'ref', obj, [(obj, 'obj')], 'Take a reference', 'The object')
+		s += self.__function(prefix + 'unref', 'void', [(obj, 'obj')], 'Release a reference')
+		s += self.__function(prefix + 'new', obj, [], 'Create an object', 'A new object')
+		s += self.__function(prefix + 'get_callbacks', cbsName + ' *', [(constObj, 'obj')], 'Get the callbacks', 'The callbacks')
+		s += self.__function(prefix + 'get_kind', enumName, [(constObj, 'obj')], 'Get the kind', 'The kind')
+		s += self.__function(prefix + 'set_kind', 'void', [(obj, 'obj'), (enumName, 'kind')], 'Set the kind')
+		s += self.__function(prefix + 'enable_feature', 'void', [(obj, 'obj'), ('bool_t', 'enable')], 'Enable the feature')
+		s += self.__function(prefix + 'feature_enabled', 'bool_t', [(constObj, 'obj')], 'Tell whether the feature is enabled', 'A boolean')
+		s += self.__function(prefix + 'is_ready', 'bool_t', [(constObj, 'obj')], 'Tell whether the object is ready', 'A boolean')
+		s += self.__function(prefix + 'get_name', 'const char *', [(constObj, 'obj')], 'Get the name', 'The name')
+		s += self.__function(prefix + 'set_name', 'void', [(obj, 'obj'), ('const char *', 'name')], 'Set the name')
+		s += self.__function(prefix + 'get_items', 'const bctbx_list_t *', [(constObj, 'obj')], 'Get the items', 'The items', containedType = className)
+		s += self.__function(prefix + 'get_labels', 'bctbx_list_t *', [(constObj, 'obj')], 'Get the labels', 'The labels', containedType = 'const char *')
+		s += self.__function(prefix + 'get_size', 'size_t', [(constObj, 'obj')], 'Get the size', 'The size')
+		s += self.__function(prefix + 'get_counter', 'uint64_t', [(constObj, 'obj')], 'Get the counter', 'The counter')
+		s += self.__function(prefix + 'get_ratio', 'float', [(constObj, 'obj')], 'Get the ratio', 'The ratio')
+		s += self.__function(prefix + 'set_ratio', 'void', [(obj, 'obj'), ('float', 'ratio')], 'Set the ratio')
+		s += self.__function(prefix + 'old_function', 'int', [(obj, 'obj')], 'Deprecated function', 'A status', deprecated = True)
+		s += self.__function(prefix + 'hidden_function', 'void', [(obj, 'obj')], 'Function not to wrap', donotwrap = True)
+		s += self.__function(prefix + 'internal_function', 'void', [(obj, 'obj')], 'Internal function', internal = True)
+		for m in range(self.nmethods):
+			other = self.classes[(index + m + 1) % len(self.classes)]
+			params = [ (obj, 'obj'), (other + ' *', 'other'), ('unsigned int', 'count'), ('const char *', 'label') ]
+			s += self.__function(prefix + 'do_action_{0}'.format(m), 'int', params, 'Do action {0}'.format(m), 'A status')
+		s += self.__function(cbsPrefix + 'ref', cbsName + ' *', [(cbsName + ' *', 'cbs')], 'Take a reference', 'The callbacks')
+		s += self.__function(cbsPrefix + 'unref', 'void', [(cbsName + ' *', 'cbs')], 'Release a reference')
+		s += self.__function(cbsPrefix + 'get_user_data', 'void *', [('const ' + cbsName + ' *', 'cbs')], 'Get the user data', 'The user data')
+		s += self.__function(cbsPrefix + 'set_user_data', 'void', [(cbsName + ' *', 'cbs'), ('void *', 'ud')], 'Set the user data')
+		for event, eventName in events:
+			s += self.__function(cbsPrefix + 'get_' + event, eventName, [('const ' + cbsName + ' *', 'cbs')], 'Get the callback', 'The callback')
+			s += self.__function(cbsPrefix + 'set_' + event, 'void', [(cbsName + ' *', 'cbs'), (eventName, 'cb')], 'Set the callback')
+		s += '</sectiondef>\n<briefdescription>\n</briefdescription>\n<detaileddescription>\n</detaileddescription>\n</compounddef>\n</doxygen>\n'
+		return s
+
+	def __struct(self):
+		s = self.__header()
+		s += '<compounddef id="struct___linphone_sip_transports" kind="struct" prot="public">\n<compoundname>_LinphoneSipTransports</compoundname>\n<sectiondef kind="public-attrib">\n'
+		for member in ['udp_port', 'tcp_port', 'tls_port']:
+			s += '<memberdef kind="variable" id="{0}" prot="public" static="no" mutable="no">\n<type>int</type>\n<definition>int _LinphoneSipTransports::{0}</definition>\n<name>{0}</name>\n'.format(member)
+			s += '<briefdescription>\n<para>Port. </para>\n</briefdescription>\n<detaileddescription>\n</detaileddescription>\n</memberdef>\n'
+		s += '</sectiondef>\n<briefdescription>\n<para>Transports. </para>\n</briefdescription>\n<detaileddescription>\n</detaileddescription>\n</compounddef>\n</doxygen>\n'
+		return s
+
+	def write(self, xmldir):
+		if not os.path.isdir(xmldir):
+			os.makedirs(xmldir)
+		for i, className in enumerate(self.classes):
+			with open(os.path.join(xmldir, 'group__' + snakeCase(className) + '.xml'), 'w') as f:
+				f.write(self.__group(i, className))
+		with open(os.path.join(xmldir, 'struct___linphone_sip_transports.xml'), 'w') as f:
+			f.write(self.__struct())
+
+
+def residentMemory():
+	try:
+		with open('/proc/self/statm') as f:
+			return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+	except (IOError, OSError):
+		import resource
+		return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Measure:
+	"""Wall time, peak memory and memory still in use at the end of a block of
+	code. Memory is the one of Python allocations when tracemalloc is
+	available, the resident memory otherwise."""
+
+	def __init__(self):
+		self.time = 0
+		self.peak = 0
+		self.retained = 0
+
+	def __enter__(self):
+		try:
+			import tracemalloc
+			tracemalloc.start()
+			self.__tracemalloc = tracemalloc
+		except ImportError:
+			self.__tracemalloc = None
+		self.__start = time.time()
+		return self
+
+	def __exit__(self, *args):
+		self.time = time.time() - self.__start
+		gc.collect()
+		if self.__tracemalloc is not None:
+			self.retained, self.peak = self.__tracemalloc.get_traced_memory()
+			self.__tracemalloc.stop()
+		else:
+			import resource
+			self.peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+			self.retained = residentMemory()
+		return False
+
+
+class SilentStdout:
+	def __enter__(self):
+		self.__stdout = sys.stdout
+		sys.stdout = open(os.devnull, 'w')
+
+	def __exit__(self, *args):
+		sys.stdout.close()
+		sys.stdout = self.__stdout
+		return False
+
+
+def measureIngestion(xmldir, streaming):
+	project = CApi.Project()
+	project.streaming = streaming
+	with Measure() as m:
+		with SilentStdout():
+			project.initFromDir(xmldir)
+	return { 'time' : m.time, 'peak' : m.peak, 'retained' : m.retained, 'classes' : len(project.classes) }
+
+
+def xmlFiles(xmldir):
+	return [ os.path.join(xmldir, f) for f in os.listdir(xmldir) if f.endswith('.xml') ]
+
+
+def naiveOwners(classes, events, functions):
+	"""Owner class of each event and function computed with the linear
+	prefix scans that Project.discoverClasses() used to do."""
+	owners = {}
+	for e in events:
+		candidates = [ c for c in classes if c.name.endswith('Cbs') and e.name.startswith(c.name) ]
+		if len(candidates) == 0:
+			candidates = [ c for c in classes if e.name.startswith(c.name) ]
+		owners.setdefault(e.name, candidates[0].name if len(candidates) > 0 else None)
+	for f in functions:
+		owner = None
+		for c in classes:
+			if c.cFunctionPrefix == f.name[0 : len(c.cFunctionPrefix)]:
+				owner = c.name
+				break
+		owners.setdefault(f.name, owner)
+	return owners
+
+
+def actualOwners(classes):
+	owners = {}
+	for c in classes:
+		functions = list(c.events.values()) + list(c.classMethods.values()) + list(c.instanceMethods.values())
+		for p in c.properties.values():
+			functions += [ f for f in [p.getter, p.setter] if f is not None ]
+		for f in functions:
+			owners.setdefault(f.name, c.name)
+	return owners
+
+
+def discoveryBenchmark(args):
+	sizes = [ int(size) for size in args.sizes.split(',') ]
+	if args.xmldir is not None:
+		sizes = [ None ]
+	failed = False
+	print("{0:>8} {1:>10} {2:>12} {3:>14} {4:>12}".format('classes', 'functions', 'discovery s', 'us/function', 'naive scan s'))
+	for size in sizes:
+		xmldir = args.xmldir
+		if size is not None:
+			xmldir = tempfile.mkdtemp(prefix='doxygen-')
+			DoxygenSynthesizer(size, args.methods).write(xmldir)
+		try:
+			project = CApi.Project()
+			project.streaming = True
+			with SilentStdout():
+				enums, structs, typedefs, events, functions = project.extractFromFiles(xmlFiles(xmldir))
+				start = time.time()
+				project.discoverClasses()
+				elapsed = time.time() - start
+			start = time.time()
+			expected = naiveOwners(project.classes, events, functions)
+			naiveElapsed = time.time() - start
+		finally:
+			if size is not None:
+				shutil.rmtree(xmldir)
+		actual = actualOwners(project.classes)
+		for name, owner in expected.items():
+			if actual.get(name) != owner:
+				print("{0} has been put in {1} instead of {2}".format(name, actual.get(name), owner))
+				failed = True
+		print("{0:8d} {1:10d} {2:12.3f} {3:14.2f} {4:12.3f}".format(len(project.classes), len(functions),
+			elapsed, elapsed * 1000000 / max(1, len(functions) + len(events)), naiveElapsed))
+	return 1 if failed else 0
+
+
+def rawArgumentTypes(xmldir):
+	types = []
+	for xmlfile in xmlFiles(xmldir):
+		for memberdef in ET.parse(xmlfile).iterfind(".//memberdef[@kind='function']"):
+			types.append(''.join(memberdef.find('./type').itertext()))
+			for param in memberdef.iterfind('./param/type'):
+				types.append(''.join(param.itertext()))
+	return types
+
+
+def typesBenchmark(args):
+	xmldir = args.xmldir
+	if xmldir is None:
+		xmldir = tempfile.mkdtemp(prefix='doxygen-')
+		DoxygenSynthesizer(args.classes, args.methods).write(xmldir)
+	try:
+		project = CApi.Project()
+		project.streaming = True
+		with SilentStdout():
+			project.initFromDir(xmldir)
+			enums, structs = project.extractedRecords()[0:2]
+		types = rawArgumentTypes(xmldir)
+	finally:
+		if args.xmldir is None:
+			shutil.rmtree(xmldir)
+	cache = CApi.CArgument.typeCache
+	start = time.time()
+	for i in range(args.repeat):
+		for t in types:
+			cache.clear()
+			CApi.CArgument(t, enums = enums, structs = structs)
+	uncached = time.time() - start
+	start = time.time()
+	for i in range(args.repeat):
+		cache.clear()
+		for t in types:
+			CApi.CArgument(t, enums = enums, structs = structs)
+	cached = time.time() - start
+	print("{0} argument types ({1} distinct), {2} runs".format(len(types), len(set(types)), args.repeat))
+	print("uncached: {0:.3f} s".format(uncached))
+	print("  cached: {0:.3f} s (x{1:.1f})".format(cached, uncached / max(cached, 1e-9)))
+	return 0
+
+
+def descriptionsBenchmark(args):
+	xmldir = args.xmldir
+	if xmldir is None:
+		xmldir = tempfile.mkdtemp(prefix='doxygen-')
+		DoxygenSynthesizer(args.classes, args.methods).write(xmldir)
+	try:
+		parsing = generation = None
+		for i in range(args.repeat):
+			project = CApi.Project()
+			with SilentStdout():
+				start = time.time()
+				project.initFromDir(xmldir)
+				parsed = time.time()
+				with open(os.devnull, 'wb') as output:
+					CApi.Generator(output).generate(project)
+				generated = time.time()
+			parsing = min(parsing or parsed - start, parsed - start)
+			generation = min(generation or generated - parsed, generated - parsed)
+	finally:
+		if args.xmldir is None:
+			shutil.rmtree(xmldir)
+	print("   parsing: {0:.3f} s".format(parsing))
+	print("generation: {0:.3f} s".format(generation))
+	print("     total: {0:.3f} s".format(parsing + generation))
+	return 0
+
+
+def wrapperBenchmark(args):
+	sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'wrappers', 'cpp'))
+	import genwrapper
+	xmldir = args.xmldir
+	if xmldir is None:
+		xmldir = tempfile.mkdtemp(prefix='doxygen-')
+		DoxygenSynthesizer(args.classes, args.methods).write(xmldir)
+	outputdir = tempfile.mkdtemp(prefix='linphone++-')
+	try:
+		includedir = os.path.join(outputdir, 'include', 'linphone++')
+		srcdir = os.path.join(outputdir, 'src')
+		os.makedirs(includedir)
+		os.makedirs(srcdir)
+		rendering = None
+		with SilentStdout():
+			start = time.time()
+			wrapper = genwrapper.GenWrapper(includedir, srcdir, xmldir)
+			parsing = time.time() - start
+			for i in range(args.repeat):
+				# The API is parsed again for each run so that nothing is
+				# memoized from the previous one
+				wrapper = genwrapper.GenWrapper(includedir, srcdir, xmldir)
+				wrapper.jobs = args.jobs
+				start = time.time()
+				wrapper.render_all()
+				rendering = min(rendering or time.time() - start, time.time() - start)
+	finally:
+		shutil.rmtree(outputdir)
+		if args.xmldir is None:
+			shutil.rmtree(xmldir)
+	print("   parsing: {0:.3f} s".format(parsing))
+	print("render_all: {0:.3f} s".format(rendering))
+	return 0
+
+
+def templatesBenchmark(args):
+	sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'wrappers', 'cpp'))
+	import genwrapper
+	import pystache
+	import templatecache
+	xmldir = args.xmldir
+	if xmldir is None:
+		xmldir = tempfile.mkdtemp(prefix='doxygen-')
+		DoxygenSynthesizer(args.classes, args.methods).write(xmldir)
+	try:
+		with SilentStdout():
+			wrapper = genwrapper.GenWrapper(None, None, xmldir)
+			headers = []
+			for _class in list(wrapper.parser.interfacesIndex.values()) + list(wrapper.parser.classesIndex.values()):
+				try:
+					headers.append(genwrapper.ClassHeader(_class, wrapper.translator))
+				except genwrapper.AbsApi.Error:
+					pass
+	finally:
+		if args.xmldir is None:
+			shutil.rmtree(xmldir)
+	results = []
+	for renderer in [ pystache.Renderer(), templatecache.CachedRenderer() ]:
+		best = None
+		for i in range(args.repeat):
+			start = time.time()
+			for header in headers:
+				renderer.render(header)
+			elapsed = time.time() - start
+			best = min(best or elapsed, elapsed)
+		results.append(best)
+	print("{0} class headers".format(len(headers)))
+	print("  pystache.Renderer: {0:.3f} s, {1:.0f} us per class".format(results[0], results[0] * 1e6 / max(1, len(headers))))
+	print("     CachedRenderer: {0:.3f} s, {1:.0f} us per class".format(results[1], results[1] * 1e6 / max(1, len(headers))))
+	return 0
+
+
+def runGenerator(script, args, cwd = None):
+	"""Run one of the generators with --profile in a fresh interpreter and
+	return its report, or None if it failed."""
+	fd, report = tempfile.mkstemp(prefix='profile-', suffix='.json')
+	os.close(fd)
+	try:
+		with open(os.devnull, 'w') as devnull:
+			status = subprocess.call([ sys.executable, script, '--profile', report ] + args, cwd = cwd, stdout = devnull)
+		if status != 0:
+			return None
+		with open(report) as f:
+			return json.load(f)
+	finally:
+		os.unlink(report)
+
+
+def runPipeline(xmldir, workdir, jobs):
+	"""Generate api.xml, the C++ wrapper and the Python wrapper as the build
+	does, and return the report of each generator."""
+	toolsdir = os.path.dirname(os.path.abspath(__file__))
+	apixml = os.path.join(workdir, 'api.xml')
+	reports = OrderedDict()
+	reports['genapixml'] = runGenerator(os.path.join(toolsdir, 'genapixml.py'), [ '--pretty', '-o', apixml, xmldir ])
+	reports['genwrapper'] = runGenerator(os.path.join(toolsdir, '..', 'wrappers', 'cpp', 'genwrapper.py'),
+		[ '-j', str(jobs), '-o', os.path.join(workdir, 'linphone++'), xmldir ])
+	if reports['genapixml'] is not None:
+		# apixml2python.py looks for its templates from the current directory
+		reports['apixml2python'] = runGenerator(os.path.join(toolsdir, 'python', 'apixml2python.py'),
+			[ '-o', os.path.join(workdir, 'linphone.c'), apixml ], cwd = os.path.join(toolsdir, 'python'))
+	else:
+		reports['apixml2python'] = None
+	return reports
+
+
+def growthExponent(sizes, values):
+	"""Slope of the least squares fit of log(value) against log(size): about
+	1 for a linear phase, 2 for a quadratic one."""
+	points = [ (math.log(size), math.log(value)) for size, value in zip(sizes, values) if value is not None and value > 0 ]
+	if len(points) < 2:
+		return None
+	meanX = sum(x for x, y in points) / len(points)
+	meanY = sum(y for x, y in points) / len(points)
+	variance = sum((x - meanX) ** 2 for x, y in points)
+	if variance == 0:
+		return None
+	return sum((x - meanX) * (y - meanY) for x, y in points) / variance
+
+
+def isSuperlinear(values, exponent, maxExponent):
+	# Phases lasting a few milliseconds are too noisy to be reported
+	return exponent is not None and exponent > maxExponent and max(value or 0 for value in values) >= 0.05
+
+
+def pipelineBenchmark(args):
+	sizes = [ int(size) for size in args.sizes.split(',') ]
+	# results[tool][phase] is the list of the best durations at each size
+	results = OrderedDict()
+	memory = OrderedDict()
+	failed = False
+	for size in sizes:
+		workdir = tempfile.mkdtemp(prefix='pipeline-')
+		try:
+			xmldir = os.path.join(workdir, 'xml')
+			DoxygenSynthesizer(size, args.methods).write(xmldir)
+			best = OrderedDict()
+			for i in range(args.repeat):
+				for tool, report in runPipeline(xmldir, workdir, args.jobs).items():
+					if report is None:
+						if i == 0:
+							print("{0} failed with {1} classes".format(tool, size))
+						failed = True
+						continue
+					phases = [ (phase['name'], phase['seconds']) for phase in report['phases'] ] + [ ('total', report['total']) ]
+					for name, seconds in phases:
+						key = (tool, name)
+						best[key] = min(best.get(key, seconds), seconds)
+					if i == 0:
+						peak = report['tracemalloc_peak_bytes'] or report['max_rss_bytes']
+						memory.setdefault(tool, [ None ] * len(sizes))[sizes.index(size)] = peak
+		finally:
+			shutil.rmtree(workdir)
+		for (tool, name), seconds in best.items():
+			results.setdefault(tool, OrderedDict()).setdefault(name, [ None ] * len(sizes))[sizes.index(size)] = seconds
+
+	print("{0} methods per class, best of {1} runs, in seconds".format(args.methods, args.repeat))
+	print("{0:<32}".format('classes') + ''.join("{0:>10}".format(size) for size in sizes) + "{0:>10}".format('growth'))
+	exponents = []
+	for tool, phases in results.items():
+		for name, values in phases.items():
+			exponent = growthExponent(sizes, values)
+			exponents.append((tool, name, exponent))
+			line = "{0:<32}".format(tool + ' ' + name)
+			line += ''.join("{0:>10}".format('-' if value is None else '{0:.3f}'.format(value)) for value in values)
+			line += "{0:>10}".format('-' if exponent is None else 'n^{0:.2f}'.format(exponent))
+			if isSuperlinear(values, exponent, args.max_exponent):
+				line += '  <-- superlinear'
+			print(line)
+	print("Peak memory in MB ({0})".format('tracemalloc' if sys.version_info[0] >= 3 else 'maximum RSS'))
+	for tool, values in memory.items():
+		exponent = growthExponent(sizes, values)
+		line = "{0:<32}".format(tool)
+		line += ''.join("{0:>10}".format('-' if value is None else '{0:.1f}'.format(value / 1048576.0)) for value in values)
+		line += "{0:>10}".format('-' if exponent is None else 'n^{0:.2f}'.format(exponent))
+		print(line)
+
+	if args.json is not None:
+		with open(args.json, 'w') as f:
+			json.dump(OrderedDict([
+				('sizes', sizes),
+				('methods', args.methods),
+				('python', sys.version.split()[0]),
+				('seconds', results),
+				('peak_bytes', memory),
+				('growth', [ OrderedDict([('tool', tool), ('phase', name), ('exponent', exponent)]) for tool, name, exponent in exponents ])
+			]), f, indent = 2, separators = (',', ': '))
+	if args.fail_superlinear and any(isSuperlinear(results[tool][name], exponent, args.max_exponent) for tool, name, exponent in exponents):
+		failed = True
+	return 1 if failed else 0
+
+
+def runInChild(*args):
+	"""Run a measure in a fresh interpreter so that peaks do not add up."""
+	cmd = [ sys.executable, os.path.abspath(__file__), 'child' ] + [ str(a) for a in args ]
+	return json.loads(subprocess.check_output(cmd).decode('utf-8'))
+
+
+def memoryBenchmark(args):
+	xmldir = args.xmldir
+	if xmldir is None:
+		xmldir = tempfile.mkdtemp(prefix='doxygen-')
+		DoxygenSynthesizer(args.classes * args.scale, args.methods).write(xmldir)
+		print("Synthetic Doxygen tree: {0} classes x {1} methods".format(args.classes * args.scale, args.methods))
+	try:
+		results = {}
+		for mode in ['tree', 'stream']:
+			results[mode] = runInChild('ingestion', xmldir, mode)
+			print("{0:>8}: {1:8.2f} s  peak {2:8.1f} MB  model {3:8.1f} MB".format(mode, results[mode]['time'],
+				results[mode]['peak'] / 1048576.0, results[mode]['retained'] / 1048576.0))
+	finally:
+		if args.xmldir is None:
+			shutil.rmtree(xmldir)
+	if results['tree']['classes'] != results['stream']['classes']:
+		print("The streaming parser did not find the same classes")
+		return 1
+	if args.max_peak_mb is not None and results['stream']['peak'] > args.max_peak_mb * 1048576:
+		print("Streaming peak memory is above the {0} MB ceiling".format(args.max_peak_mb))
+		return 1
+	return 0
+
+
+def child(args):
+	if args[0] == 'ingestion':
+		result = measureIngestion(args[1], args[2] == 'stream')
+	print(json.dumps(result))
+	return 0
+
+
+def main(argv = None):
+	if argv is None:
+		argv = sys.argv
+	if len(argv) > 1 and argv[1] == 'child':
+		return child(argv[2:])
+	argparser = argparse.ArgumentParser(description="Benchmark the API code generators on synthetic Doxygen XML.")
+	subparsers = argparser.add_subparsers(dest='command')
+	synthesizeParser = subparsers.add_parser('synthesize', help="Write a synthetic Doxygen XML directory.")
+	synthesizeParser.add_argument('--classes', type=int, default=60, help="Number of classes")
+	synthesizeParser.add_argument('--methods', type=int, default=20, help="Number of methods per class")
+	synthesizeParser.add_argument('xmldir', help="Output directory")
+	memoryParser = subparsers.add_parser('memory', help="Compare the peak memory of the tree and streaming parsers and report the memory used by the C model.")
+	memoryParser.add_argument('--classes', type=int, default=60, help="Number of classes of the base API")
+	memoryParser.add_argument('--methods', type=int, default=20, help="Number of methods per class")
+	memoryParser.add_argument('--scale', type=int, default=10, help="Size of the synthetic API relative to the base one")
+	memoryParser.add_argument('--max-peak-mb', type=float, help="Fail if the streaming parser peak memory is above this value")
+	memoryParser.add_argument('--xmldir', help="Use this Doxygen XML directory (eg. the real API) instead of a synthetic one")
+	discoveryParser = subparsers.add_parser('discovery', help="Measure how the class discovery scales and check the class membership.")
+	discoveryParser.add_argument('--sizes', default='50,100,200,400,800', help="Comma-separated numbers of classes")
+	discoveryParser.add_argument('--methods', type=int, default=20, help="Number of methods per class")
+	discoveryParser.add_argument('--xmldir', help="Use this Doxygen XML directory (eg. the real API) instead of synthetic ones")
+	typesParser = subparsers.add_parser('types', help="Measure the resolution of the C argument types with and without cache.")
+	typesParser.add_argument('--classes', type=int, default=60, help="Number of classes")
+	typesParser.add_argument('--methods', type=int, default=20, help="Number of methods per class")
+	typesParser.add_argument('--repeat', type=int, default=5, help="Number of runs")
+	typesParser.add_argument('--xmldir', help="Use this Doxygen XML directory (eg. the real API) instead of a synthetic one")
+	descriptionsParser = subparsers.add_parser('descriptions', help="Measure the parsing and the generation of the API, where the descriptions are cleaned.")
+	descriptionsParser.add_argument('--classes', type=int, default=60, help="Number of classes")
+	descriptionsParser.add_argument('--methods', type=int, default=20, help="Number of methods per class")
+	descriptionsParser.add_argument('--repeat', type=int, default=5, help="Number of runs, the best one is reported")
+	descriptionsParser.add_argument('--xmldir', help="Use this Doxygen XML directory (eg. the real API) instead of a synthetic one")
+	wrapperParser = subparsers.add_parser('wrapper', help="Measure the generation of the C++ wrapper.")
+	wrapperParser.add_argument('--classes', type=int, default=60, help="Number of classes")
+	wrapperParser.add_argument('--methods', type=int, default=20, help="Number of methods per class")
+	wrapperParser.add_argument('--repeat', type=int, default=3, help="Number of runs, the best one is reported")
+	wrapperParser.add_argument('--xmldir', help="Use this Doxygen XML directory or API model file (eg. the real API) instead of a synthetic one")
+	wrapperParser.add_argument('-j', '--jobs', type=int, default=1, help="Number of processes used to render the class headers")
+	templatesParser = subparsers.add_parser('templates', help="Measure the rendering of the C++ class headers with and without the template cache.")
+	templatesParser.add_argument('--classes', type=int, default=60, help="Number of classes")
+	templatesParser.add_argument('--methods', type=int, default=20, help="Number of methods per class")
+	templatesParser.add_argument('--repeat', type=int, default=3, help="Number of runs, the best one is reported")
+	templatesParser.add_argument('--xmldir', help="Use this Doxygen XML directory or API model file (eg. the real API) instead of a synthetic one")
+	pipelineParser = subparsers.add_parser('pipeline', help="Run genapixml.py, genwrapper.py and apixml2python.py on synthetic APIs of several sizes and report how the time and the memory of each phase grow.")
+	pipelineParser.add_argument('--sizes', default='25,50,100,200', help="Comma-separated numbers of classes")
+	pipelineParser.add_argument('--methods', type=int, default=20, help="Number of methods per class")
+	pipelineParser.add_argument('--repeat', type=int, default=1, help="Number of runs, the best one is reported")
+	pipelineParser.add_argument('-j', '--jobs', type=int, default=1, help="Number of processes used to render the C++ class headers")
+	pipelineParser.add_argument('--max-exponent', type=float, default=1.3, help="Growth exponent above which a phase is reported as superlinear")
+	pipelineParser.add_argument('--fail-superlinear', action='store_true', help="Fail if a phase grows faster than --max-exponent")
+	pipelineParser.add_argument('--json', metavar='file', help="Also write the curves to this JSON file")
+	args = argparser.parse_args(argv[1:])
+	if args.command == 'synthesize':
+		DoxygenSynthesizer(args.classes, args.methods).write(args.xmldir)
+		return 0
+	elif args.command == 'memory':
+		return memoryBenchmark(args)
+	elif args.command == 'discovery':
+		return discoveryBenchmark(args)
+	elif args.command == 'wrapper':
+		return wrapperBenchmark(args)
+	elif args.command == 'descriptions':
+		return descriptionsBenchmark(args)
+	elif args.command == 'types':
+		return typesBenchmark(args)
+	elif args.command == 'templates':
+		return templatesBenchmark(args)
+	elif args.command == 'pipeline':
+		return pipelineBenchmark(args)
+	argparser.print_help()
+	return 1
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -17,29 +17,126 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
 import argparse
+import hashlib
+import multiprocessing
 import os
 import six
 import string
 import sys
+import tempfile
 import xml.etree.ElementTree as ET
-import xml.dom.minidom as minidom
+from six.moves import cPickle as pickle
+
+import profiling
+
+
+class CDescription(object):
+	"""Description subtree of the Doxygen XML. It is kept serialized, which is
+	much more compact than the element tree, and a new element is built from it
+	the first time it is accessed. That element is cleaned then, so that the
+	descriptions of the items that are never generated are never cleaned, and
+	is kept for the later accesses. The first return simplesect of the detailed
+	description of functions and events is kept as a description, as it used
+	to be when it was cleaned in place before the detailed description."""
+	__slots__ = ('xml', 'tail', 'keepsReturn', 'node')
+
+	def __init__(self, node, keepsReturn = False):
+		self.tail = node.tail
+		node.tail = None
+		self.xml = ET.tostring(node)
+		node.tail = self.tail
+		self.keepsReturn = keepsReturn
+		self.node = None
+
+	def __getstate__(self):
+		# The cleaned element is not picklable with cElementTree and is cheap to
+		# build again
+		return (self.xml, self.tail, self.keepsReturn)
+
+	def __setstate__(self, state):
+		self.xml, self.tail, self.keepsReturn = state
+		self.node = None
+
+	@staticmethod
+	def __clean(descriptionNode, keepsReturn = False):
+		if keepsReturn:
+			returndesc = descriptionNode.find("./para/simplesect[@kind='return']")
+			if returndesc is not None:
+				CDescription.__clean(returndesc)
+		for para in descriptionNode.findall('./para'):
+			for n in list(para):
+				if n.tag == 'parameterlist':
+					para.remove(n)
+				elif n.tag == 'simplesect':
+					kind = n.get('kind')
+					if kind == 'return':
+						para.remove(n)
+					elif kind == 'see':
+						t = ''.join(n.itertext())
+						n.clear()
+						n.tag = 'see'
+						n.text = t
+					elif kind == 'note':
+						n.tag = 'note'
+						n.attrib = {}
+			# Most paragraphs are plain text, look for nested elements only if
+			# there are some
+			tags = set([n.tag for n in para.iter()])
+			if 'xrefsect' in tags:
+				for n in para.findall(".//xrefsect"):
+					para.remove(n)
+			if 'ref' in tags:
+				for n in para.findall('.//ref'):
+					n.attrib = {}
+			if 'bctbx_list' in tags:
+				for n in para.findall(".//bctbx_list"):
+					para.remove(n)
+		if descriptionNode.tag == 'parameterdescription':
+			descriptionNode.tag = 'description'
+		if descriptionNode.tag == 'simplesect':
+			descriptionNode.tag = 'description'
+			descriptionNode.attrib = {}
+
+	def materialize(self):
+		if self.node is None:
+			node = ET.fromstring(self.xml)
+			CDescription.__clean(node, self.keepsReturn)
+			node.tail = self.tail
+			self.node = node
+		return self.node
+
 
+class CObject(object):
+	__slots__ = ('name', 'briefDescription', 'detailedDescriptionRef', 'deprecated')
 
-class CObject:
 	def __init__(self, name):
 		self.name = name.strip()
 		self.briefDescription = ''
-		self.detailedDescription = None
+		self.detailedDescriptionRef = None
 		self.deprecated = False
 
+	def __getDetailedDescription(self):
+		if self.detailedDescriptionRef is None:
+			return None
+		return self.detailedDescriptionRef.materialize()
+
+	def __setDetailedDescription(self, node):
+		self.detailedDescriptionRef = None if node is None else CDescription(node)
+
+	detailedDescription = property(fget=__getDetailedDescription, fset=__setDetailedDescription)
+
 
 class CEnumValue(CObject):
+	__slots__ = ('value',)
+
 	def __init__(self, name):
 		CObject.__init__(self, name)
 		self.value = None
 
 
 class CEnum(CObject):
+	__slots__ = ('values', 'associatedTypedef')
+
 	def __init__(self, name):
 		CObject.__init__(self, name)
 		self.values = []
@@ -50,12 +147,16 @@ class CEnum(CObject):
 
 
 class CStructMember(CObject):
+	__slots__ = ('ctype',)
+
 	def __init__(self, name, t):
 		CObject.__init__(self, name)
 		self.ctype = t.strip()
 
 
 class CStruct(CObject):
+	__slots__ = ('members', 'associatedTypedef')
+
 	def __init__(self, name):
 		CObject.__init__(self, name)
 		self.members = []
@@ -66,16 +167,35 @@ class CStruct(CObject):
 
 
 class CTypedef(CObject):
+	__slots__ = ('definition',)
+
 	def __init__(self, name, definition):
 		CObject.__init__(self, name)
 		self.definition = definition.strip()
 
 
 class CArgument(CObject):
+	# Resolved (ctype, completeType) of the C types, keyed on the raw type
+	# string, so that types used by many arguments are only parsed once. Types
+	# with a 'struct' or 'enum' keyword are not cached since their resolution
+	# depends on the structs and enums known at that time.
+	typeCache = {}
+
+	__slots__ = ('descriptionRef', 'containedType', 'ctype', 'completeType')
+
 	def __init__(self, t, name = '', enums = [], structs = []):
 		CObject.__init__(self, name)
-		self.description = None
+		self.descriptionRef = None
 		self.containedType = None
+		resolvedType = CArgument.typeCache.get(t)
+		if resolvedType is None:
+			resolvedType, cacheable = CArgument.__resolveType(t, enums, structs)
+			if cacheable:
+				CArgument.typeCache[t] = resolvedType
+		self.ctype, self.completeType = resolvedType
+
+	@staticmethod
+	def __resolveType(t, enums, structs):
 		keywords = [ 'const', 'struct', 'enum', 'signed', 'unsigned', 'short', 'long', '*' ]
 		fullySplittedType = []
 		splittedType = t.strip().split(' ')
@@ -95,10 +215,10 @@ class CArgument(CObject):
 			fullySplittedType.remove('LINPHONE_DEPRECATED')
 		isStruct = False
 		isEnum = False
-		self.ctype = 'int' # Default to int so that the result is correct eg. for 'unsigned short'
+		ctype = 'int' # Default to int so that the result is correct eg. for 'unsigned short'
 		for s in fullySplittedType:
 			if not s in keywords:
-				self.ctype = s
+				ctype = s
 			if s == 'struct':
 				isStruct = True
 			if s == 'enum':
@@ -106,23 +226,35 @@ class CArgument(CObject):
 		if isStruct:
 			for st in structs:
 				if st.associatedTypedef is not None:
-					self.ctype = st.associatedTypedef.name
+					ctype = st.associatedTypedef.name
 		elif isEnum:
 			for e in enums:
 				if e.associatedTypedef is not None:
-					self.ctype = e.associatedTypedef.name
-		if self.ctype == 'int' and 'int' not in fullySplittedType:
+					ctype = e.associatedTypedef.name
+		if ctype == 'int' and 'int' not in fullySplittedType:
 			if fullySplittedType[-1] == '*':
 				fullySplittedType.insert(-1, 'int')
 			else:
 				fullySplittedType.append('int')
-		self.completeType = ' '.join(fullySplittedType)
+		return ((ctype, ' '.join(fullySplittedType)), not (isStruct or isEnum))
+
+	def __getDescription(self):
+		if self.descriptionRef is None:
+			return None
+		return self.descriptionRef.materialize()
+
+	def __setDescription(self, node):
+		self.descriptionRef = None if node is None else CDescription(node)
+
+	description = property(fget=__getDescription, fset=__setDescription)
 
 	def __str__(self):
 		return self.completeType + " " + self.name
 
 
-class CArgumentsList:
+class CArgumentsList(object):
+	__slots__ = ('arguments',)
+
 	def __init__(self):
 		self.arguments = []
 
@@ -143,6 +275,8 @@ class CArgumentsList:
 
 
 class CFunction(CObject):
+	__slots__ = ('returnArgument', 'arguments', 'location')
+
 	def __init__(self, name, returnarg, argslist):
 		CObject.__init__(self, name)
 		self.returnArgument = returnarg
@@ -151,10 +285,12 @@ class CFunction(CObject):
 
 
 class CEvent(CFunction):
-	pass
+	__slots__ = ()
+
 
+class CProperty(object):
+	__slots__ = ('name', 'getter', 'setter')
 
-class CProperty:
 	def __init__(self, name):
 		self.name = name
 		self.getter = None
@@ -162,6 +298,8 @@ class CProperty:
 
 
 class CClass(CObject):
+	__slots__ = ('__struct', 'events', 'classMethods', 'instanceMethods', 'properties', 'cFunctionPrefix')
+
 	def __init__(self, st):
 		CObject.__init__(self, st.associatedTypedef.name)
 		if st.deprecated or st.associatedTypedef.deprecated:
@@ -170,10 +308,10 @@ class CClass(CObject):
 			self.briefDescription = st.associatedTypedef.briefDescription
 		elif len(st.briefDescription) > 0:
 			self.briefDescription = st.briefDescription
-		if st.associatedTypedef.detailedDescription is not None:
-			self.detailedDescription = st.associatedTypedef.detailedDescription
-		elif st.detailedDescription is not None:
-			self.detailedDescription = st.detailedDescription
+		if st.associatedTypedef.detailedDescriptionRef is not None:
+			self.detailedDescriptionRef = st.associatedTypedef.detailedDescriptionRef
+		elif st.detailedDescriptionRef is not None:
+			self.detailedDescriptionRef = st.detailedDescriptionRef
 		self.__struct = st
 		self.events = {}
 		self.classMethods = {}
@@ -238,6 +376,9 @@ class Project:
 	def __init__(self):
 		self.verbose = False
 		self.prettyPrint = False
+		self.jobs = 1
+		self.streaming = False
+		self.cacheDir = None
 		self.enums = []
 		self.__structs = []
 		self.__typedefs = []
@@ -280,62 +421,44 @@ class Project:
 				print("\tArguments: " + str(elem.arguments))
 			self.__functions.append(elem)
 
-	def __cleanDescription(self, descriptionNode):
-		for para in descriptionNode.findall('./para'):
-			for n in para.findall('./parameterlist'):
-				para.remove(n)
-			for n in para.findall("./simplesect[@kind='return']"):
-				para.remove(n)
-			for n in para.findall("./simplesect[@kind='see']"):
-				t = ''.join(n.itertext())
-				n.clear()
-				n.tag = 'see'
-				n.text = t
-			for n in para.findall("./simplesect[@kind='note']"):
-				n.tag = 'note'
-				n.attrib = {}
-			for n in para.findall(".//xrefsect"):
-				para.remove(n)
-			for n in para.findall('.//ref'):
-				n.attrib = {}
-			for n in para.findall(".//bctbx_list"):
-				para.remove(n)
-		if descriptionNode.tag == 'parameterdescription':
-			descriptionNode.tag = 'description'
-		if descriptionNode.tag == 'simplesect':
-			descriptionNode.tag = 'description'
-			descriptionNode.attrib = {}
-		return descriptionNode
-	
 	def __canBeWrapped(self, node):
 		return node.find('./detaileddescription//donotwrap') is None
 
-	def __discoverClasses(self):
+	def __longestPrefixes(self, names):
+		# Distinct lengths of the given names, longest first, to look names up
+		# by prefix without scanning all of them
+		return sorted(set([len(name) for name in names]), reverse = True)
+
+	def discoverClasses(self):
+		enumsByName = {}
+		for e in self.enums:
+			if e.associatedTypedef is None:
+				enumsByName.setdefault(e.name, []).append(e)
+		structsByName = {}
+		for st in self.__structs:
+			if st.associatedTypedef is None:
+				structsByName.setdefault(st.name, []).append(st)
+		structsByTypedef = {}
 		for td in self.__typedefs:
 			if td.definition.startswith('enum '):
-				for e in self.enums:
-					if (e.associatedTypedef is None) and td.definition[5:] == e.name:
-						e.associatedTypedef = td
-						break
+				candidates = enumsByName.get(td.definition[5:])
+				if candidates:
+					candidates.pop(0).associatedTypedef = td
 			elif td.definition.startswith('struct '):
-				structFound = False
-				for st in self.__structs:
-					if (st.associatedTypedef is None) and td.definition[7:] == st.name:
-						st.associatedTypedef = td
-						structFound = True
-						break
-				if not structFound:
+				candidates = structsByName.get(td.definition[7:])
+				if candidates:
+					st = candidates.pop(0)
+					st.associatedTypedef = td
+				else:
 					name = td.definition[7:]
 					print("Structure with no associated typedef: " + name)
 					st = CStruct(name)
 					st.associatedTypedef = td
 					self.add(st)
+				structsByTypedef[id(td)] = st
 		for td in self.__typedefs:
 			if td.definition.startswith('struct '):
-				for st in self.__structs:
-					if st.associatedTypedef == td:
-						self.add(CClass(st))
-						break
+				self.add(CClass(structsByTypedef[id(td)]))
 			elif ('Linphone' + td.definition) == td.name:
 				st = CStruct(td.name)
 				st.associatedTypedef = td
@@ -343,24 +466,42 @@ class Project:
 				self.add(CClass(st))
 		# Sort classes by length of name (longest first), so that methods are put in the right class
 		self.classes.sort(key = lambda c: len(c.name), reverse = True)
+		# Index the classes by name and by function prefix, keeping the first
+		# one in the sorted list when several classes share the same key
+		classesByName = {}
+		cbsClassesByName = {}
+		classesByPrefix = {}
+		for rank, c in enumerate(self.classes):
+			classesByName.setdefault(c.name, c)
+			if c.name.endswith('Cbs'):
+				cbsClassesByName.setdefault(c.name, c)
+			classesByPrefix.setdefault(c.cFunctionPrefix, (rank, c))
+		nameLengths = self.__longestPrefixes(classesByName)
+		cbsNameLengths = self.__longestPrefixes(cbsClassesByName)
+		prefixLengths = self.__longestPrefixes(classesByPrefix)
 		for e in self.__events:
-			eventAdded = False
-			for c in self.classes:
-				if c.name.endswith('Cbs') and e.name.startswith(c.name):
-					c.addEvent(e)
-					eventAdded = True
+			eventClass = None
+			for l in cbsNameLengths:
+				eventClass = cbsClassesByName.get(e.name[0 : l])
+				if eventClass is not None:
 					break
-			if not eventAdded:
-				for c in self.classes:
-					if e.name.startswith(c.name):
-						c.addEvent(e)
-						eventAdded = True
+			if eventClass is None:
+				for l in nameLengths:
+					eventClass = classesByName.get(e.name[0 : l])
+					if eventClass is not None:
 						break
+			if eventClass is not None:
+				eventClass.addEvent(e)
 		for f in self.__functions:
-			for c in self.classes:
-				if c.cFunctionPrefix == f.name[0 : len(c.cFunctionPrefix)]:
-					c.addMethod(f)
-					break
+			# Several prefixes may match, the class coming first in the sorted
+			# list wins
+			best = None
+			for l in prefixLengths:
+				candidate = classesByPrefix.get(f.name[0 : l])
+				if candidate is not None and (best is None or candidate[0] < best[0]):
+					best = candidate
+			if best is not None:
+				best[1].addMethod(f)
 
 	def __parseCEnumValueInitializer(self, initializer):
 		initializer = initializer.strip()
@@ -381,7 +522,7 @@ class Project:
 		if deprecatedNode is not None:
 			ev.deprecated = True
 		ev.briefDescription = ''.join(node.find('./briefdescription').itertext()).strip()
-		ev.detailedDescription = self.__cleanDescription(node.find('./detaileddescription'))
+		ev.detailedDescription = node.find('./detaileddescription')
 		return ev
 
 	def __parseCEnumMemberdef(self, node):
@@ -392,19 +533,13 @@ class Project:
 		if deprecatedNode is not None:
 			e.deprecated = True
 		e.briefDescription = ''.join(node.find('./briefdescription').itertext()).strip()
-		e.detailedDescription = self.__cleanDescription(node.find('./detaileddescription'))
+		e.detailedDescription = node.find('./detaileddescription')
 		enumvalues = node.findall("enumvalue[@prot='public']")
 		for enumvalue in enumvalues:
 			ev = self.__parseCEnumValue(enumvalue)
 			e.addValue(ev)
 		return e
 
-	def __findCEnum(self, tree):
-		memberdefs = tree.findall("./compounddef[@kind='group']/sectiondef[@kind='enum']/memberdef[@kind='enum'][@prot='public']")
-		for m in memberdefs:
-			e = self.__parseCEnumMemberdef(m)
-			self.add(e)
-
 	def __parseCStructMember(self, node, structname):
 		name = node.find('./name').text
 		definition = node.find('./definition').text
@@ -414,7 +549,7 @@ class Project:
 		if deprecatedNode is not None:
 			sm.deprecated = True
 		sm.briefDescription = ''.join(node.find('./briefdescription').itertext()).strip()
-		sm.detailedDescription = self.__cleanDescription(node.find('./detaileddescription'))
+		sm.detailedDescription = node.find('./detaileddescription')
 		return sm
 
 	def __parseCStructCompounddef(self, node):
@@ -423,19 +558,13 @@ class Project:
 		if deprecatedNode is not None:
 			s.deprecated = True
 		s.briefDescription = ''.join(node.find('./briefdescription').itertext()).strip()
-		s.detailedDescription = self.__cleanDescription(node.find('./detaileddescription'))
+		s.detailedDescription = node.find('./detaileddescription')
 		structmembers = node.findall("sectiondef/memberdef[@kind='variable'][@prot='public']")
 		for structmember in structmembers:
 			sm = self.__parseCStructMember(structmember, s.name)
 			s.addMember(sm)
 		return s
 
-	def __findCStruct(self, tree):
-		compounddefs = tree.findall("./compounddef[@kind='struct'][@prot='public']")
-		for c in compounddefs:
-			s = self.__parseCStructCompounddef(c)
-			self.add(s)
-
 	def __parseCTypedefMemberdef(self, node):
 		if not Project.__canBeWrapped(self, node):
 			return None
@@ -455,7 +584,7 @@ class Project:
 					n = returndesc.find('.//bctbxlist')
 					if n is not None:
 						returnarg.containedType = n.text
-				returnarg.description = self.__cleanDescription(returndesc)
+				returnarg.description = returndesc
 			elif returnarg.completeType != 'void':
 				missingDocWarning += "\tReturn value is not documented\n"
 			definition = definition[pos + 2 :]
@@ -479,10 +608,10 @@ class Project:
 					for arg in argslist.arguments:
 						for paramdesc in paramdescs:
 							if arg.name == paramdesc.find('./parameternamelist').find('./parametername').text:
-								arg.description = self.__cleanDescription(paramdesc.find('./parameterdescription'))
+								arg.description = paramdesc.find('./parameterdescription')
 					missingDocWarning = ''
 					for arg in argslist.arguments:
-						if arg.description == None:
+						if arg.descriptionRef is None:
 							missingDocWarning += "\t'" + arg.name + "' parameter not documented\n";
 					if missingDocWarning != '':
 						print(name + ":\n" + missingDocWarning)
@@ -491,7 +620,7 @@ class Project:
 			if deprecatedNode is not None:
 				f.deprecated = True
 			f.briefDescription = ''.join(node.find('./briefdescription').itertext()).strip()
-			f.detailedDescription = self.__cleanDescription(node.find('./detaileddescription'))
+			f.detailedDescriptionRef = CDescription(node.find('./detaileddescription'), keepsReturn = True)
 			return f
 		else:
 			pos = definition.rfind(" " + name)
@@ -502,16 +631,10 @@ class Project:
 			if deprecatedNode is not None:
 				td.deprecated = True
 			td.briefDescription = ''.join(node.find('./briefdescription').itertext()).strip()
-			td.detailedDescription = self.__cleanDescription(node.find('./detaileddescription'))
+			td.detailedDescription = node.find('./detaileddescription')
 			return td
 		return None
 
-	def __findCTypedef(self, tree):
-		memberdefs = tree.findall("./compounddef[@kind='group']/sectiondef[@kind='typedef']/memberdef[@kind='typedef'][@prot='public']")
-		for m in memberdefs:
-			td = self.__parseCTypedefMemberdef(m)
-			self.add(td)
-
 	def __parseCFunctionMemberdef(self, node):
 		if not Project.__canBeWrapped(self, node):
 			return None
@@ -528,7 +651,7 @@ class Project:
 				n = returndesc.find('.//bctbxlist')
 				if n is not None:
 					returnarg.containedType = n.text
-			returnarg.description = self.__cleanDescription(returndesc)
+			returnarg.description = returndesc
 		elif returnarg.completeType != 'void':
 			missingDocWarning += "\tReturn value is not documented\n"
 		argslist = CArgumentsList()
@@ -551,19 +674,20 @@ class Project:
 								n = paramdesc.find('.//bctbxlist')
 								if n is not None:
 									arg.containedType = n.text
-							arg.description = self.__cleanDescription(paramdesc.find('./parameterdescription'))
+							arg.description = paramdesc.find('./parameterdescription')
 				missingDocWarning = ''
 				for arg in argslist.arguments:
-					if arg.description == None:
+					if arg.descriptionRef is None:
 						missingDocWarning += "\t'" + arg.name + "' parameter not documented\n";
 		f = CFunction(name, returnarg, argslist)
 		deprecatedNode = node.find(".//xrefsect[xreftitle='Deprecated']")
 		if deprecatedNode is not None:
 			f.deprecated = True
 		f.briefDescription = ''.join(node.find('./briefdescription').itertext()).strip()
-		f.detailedDescription = self.__cleanDescription(node.find('./detaileddescription'))
-		if f.briefDescription == '' and ''.join(f.detailedDescription.itertext()).strip() == '':
+		detailedDescription = CDescription(node.find('./detaileddescription'), keepsReturn = True)
+		if f.briefDescription == '' and ''.join(detailedDescription.materialize().itertext()).strip() == '':
 			return None
+		f.detailedDescriptionRef = detailedDescription
 		locationNode = node.find('./location')
 		if locationNode is not None:
 			f.location = locationNode.get('file')
@@ -573,38 +697,163 @@ class Project:
 			print(name + ":\n" + missingDocWarning)
 		return f
 
-	def __findCFunction(self, tree):
-		memberdefs = tree.findall("./compounddef[@kind='group']/sectiondef[@kind='func']/memberdef[@kind='function'][@prot='public'][@static='no']")
-		for m in memberdefs:
-			f = self.__parseCFunctionMemberdef(m)
+	def __memberdefKind(self, compounddef, sectiondef, memberdef):
+		if compounddef.get('kind') != 'group' or memberdef.get('prot') != 'public':
+			return None
+		sectionKind = sectiondef.get('kind')
+		memberKind = memberdef.get('kind')
+		if sectionKind == 'enum' and memberKind == 'enum':
+			return 'enum'
+		elif sectionKind == 'typedef' and memberKind == 'typedef':
+			return 'typedef'
+		elif sectionKind == 'func' and memberKind == 'function' and memberdef.get('static') == 'no':
+			return 'function'
+		return None
+
+	def __parseCMemberdef(self, kind, memberdef):
+		if kind == 'enum':
+			self.add(self.__parseCEnumMemberdef(memberdef))
+		elif kind == 'typedef':
+			self.add(self.__parseCTypedefMemberdef(memberdef))
+		elif kind == 'function':
+			f = self.__parseCFunctionMemberdef(memberdef)
 			if f is not None:
 				self.add(f)
 
-	def initFromFiles(self, xmlfiles):
-		trees = []
+	def __walkTree(self, tree, pending):
+		# Visit each compounddef and memberdef of the tree once and route it by
+		# kind, rather than searching the whole tree once per kind
+		for compounddef in tree.getroot().iterfind('compounddef'):
+			if compounddef.get('kind') == 'struct':
+				if compounddef.get('prot') == 'public':
+					pending['struct'].append(compounddef)
+				continue
+			for sectiondef in compounddef.iterfind('sectiondef'):
+				for memberdef in sectiondef.iterfind('memberdef'):
+					kind = self.__memberdefKind(compounddef, sectiondef, memberdef)
+					if kind is not None:
+						pending[kind].append(memberdef)
+
+	def __streamFile(self, f):
+		# Build the records of the file in a separate project so that nothing
+		# is kept from a file that turns out to be malformed, as with ET.parse()
+		project = Project()
+		project.verbose = self.verbose
+		try:
+			if self.verbose:
+				print("Parsing XML file: " + getattr(f, 'name', f))
+			stack = []
+			for event, elem in ET.iterparse(f, events=('start', 'end')):
+				if event == 'start':
+					stack.append(elem)
+					continue
+				stack.pop()
+				if elem.tag == 'memberdef' and len(stack) == 3 and stack[1].tag == 'compounddef':
+					if stack[1].get('kind') == 'group':
+						project.__parseCMemberdef(project.__memberdefKind(stack[1], stack[2], elem), elem)
+						stack[2].remove(elem)
+				elif elem.tag == 'compounddef' and len(stack) == 1:
+					if elem.get('kind') == 'struct' and elem.get('prot') == 'public':
+						project.add(project.__parseCStructCompounddef(elem))
+					stack[0].remove(elem)
+		except ET.ParseError as e:
+			print(e)
+			return
+		self.__mergeRecords(project.extractedRecords())
+
+	def __mergeRecords(self, records):
+		enums, structs, typedefs, events, functions = records
+		self.enums += enums
+		self.__structs += structs
+		self.__typedefs += typedefs
+		self.__events += events
+		self.__functions += functions
+
+	def extractedRecords(self):
+		return (self.enums, self.__structs, self.__typedefs, self.__events, self.__functions)
+
+	def extractFromFiles(self, xmlfiles):
+		if self.streaming:
+			# Memberdefs and compounddefs are parsed as soon as they are read
+			# and dropped right after, instead of keeping whole trees alive
+			for f in xmlfiles:
+				self.__streamFile(f)
+			return self.extractedRecords()
+		pending = { 'enum' : [], 'struct' : [], 'typedef' : [], 'function' : [] }
 		for f in xmlfiles:
 			tree = None
 			try:
 				if self.verbose:
-					print("Parsing XML file: " + f.name)
+					print("Parsing XML file: " + getattr(f, 'name', f))
 				tree = ET.parse(f)
 			except ET.ParseError as e:
 				print(e)
 			if tree is not None:
-				trees.append(tree)
-		for tree in trees:
-			self.__findCEnum(tree)
-		for tree in trees:
-			self.__findCStruct(tree)
-		for tree in trees:
-			self.__findCTypedef(tree)
-		for tree in trees:
-			self.__findCFunction(tree)
-		self.__discoverClasses()
+				self.__walkTree(tree, pending)
+		# Parse the nodes once all the files are walked, the enums and structs
+		# of all the files before the typedefs and the functions that use them
+		for memberdef in pending['enum']:
+			self.__parseCMemberdef('enum', memberdef)
+		for compounddef in pending['struct']:
+			self.add(self.__parseCStructCompounddef(compounddef))
+		for kind in ['typedef', 'function']:
+			for memberdef in pending[kind]:
+				self.__parseCMemberdef(kind, memberdef)
+		return self.extractedRecords()
+
+	def __extractFromEachFile(self, xmlfiles):
+		args = [(f, self.verbose, self.streaming) for f in xmlfiles]
+		if self.jobs == 1 or len(xmlfiles) < 2:
+			return [_extractFromFile(a) for a in args]
+		jobs = self.jobs
+		if jobs <= 0:
+			jobs = multiprocessing.cpu_count()
+		pool = multiprocessing.Pool(min(jobs, len(xmlfiles)))
+		try:
+			return pool.map(_extractFromFile, args)
+		finally:
+			pool.close()
+			pool.join()
+
+	def __extractFromFilesWithCache(self, xmlfiles):
+		cache = RecordsCache(self.cacheDir)
+		keys = [cache.key(f) for f in xmlfiles]
+		results = [cache.load(key) for key in keys]
+		missing = [i for i in range(len(xmlfiles)) if results[i] is None]
+		if self.verbose:
+			print(str(len(xmlfiles) - len(missing)) + " XML files found in cache, " + str(len(missing)) + " to parse")
+		for i, records in zip(missing, self.__extractFromEachFile([xmlfiles[i] for i in missing])):
+			cache.store(keys[i], records)
+			results[i] = records
+		cache.prune(keys)
+		return results
+
+	def readFiles(self, xmlfiles):
+		# Extract the records of the files, the classes are not discovered yet
+		if self.cacheDir is not None:
+			results = self.__extractFromFilesWithCache(xmlfiles)
+		elif self.jobs != 1 and len(xmlfiles) > 1:
+			results = self.__extractFromEachFile(xmlfiles)
+		else:
+			results = []
+			self.extractFromFiles(xmlfiles)
+		# Merge in the order of the input files, kind by kind, so that the
+		# lists are the same as the ones built by the serial passes
+		for records in results:
+			self.__mergeRecords(records)
+
+	def initFromFiles(self, xmlfiles):
+		self.readFiles(xmlfiles)
+		self.discoverClasses()
+
+	def __xmlFiles(self, xmldir):
+		return [ os.path.join(xmldir, f) for f in os.listdir(xmldir) if (os.path.isfile(os.path.join(xmldir, f)) and f.endswith('.xml')) ]
+
+	def readDir(self, xmldir):
+		self.readFiles(self.__xmlFiles(xmldir))
 
 	def initFromDir(self, xmldir):
-		files = [ os.path.join(xmldir, f) for f in os.listdir(xmldir) if (os.path.isfile(os.path.join(xmldir, f)) and f.endswith('.xml')) ]
-		self.initFromFiles(files)
+		self.initFromFiles(self.__xmlFiles(xmldir))
 
 	def check(self):
 		for c in self.classes:
@@ -613,15 +862,201 @@ class Project:
 					print("Property '" + name + "' of class '" + c.name + "' has a setter but no getter")
 
 
+def sourceDigest():
+	h = hashlib.sha1()
+	with open(os.path.splitext(os.path.abspath(__file__))[0] + '.py', 'rb') as f:
+		h.update(f.read())
+	return h.hexdigest()
+
+
+def modelVersion():
+	# The pickled model is tied to the classes of this script and to the
+	# strings of the major version of Python that wrote it
+	return sourceDigest() + '-py' + str(sys.version_info[0])
+
+
+def saveProject(project, path):
+	"""Write the compiled model of the API, so that the generators can load it
+	instead of parsing the Doxygen XML again. The project must have read its
+	files but not have discovered its classes yet: they are discovered again
+	when the model is loaded, which is fast and gives the method dictionaries
+	the same order as when the classes are discovered from the XML files."""
+	if len(project.classes) > 0:
+		raise ValueError("The classes of the API model must not be discovered before it is saved")
+	fd, tmppath = tempfile.mkstemp(dir = os.path.dirname(os.path.abspath(path)))
+	with os.fdopen(fd, 'wb') as f:
+		pickle.dump(('linphone-api-model', modelVersion()), f, 2)
+		pickle.dump(project, f, 2)
+	try:
+		os.rename(tmppath, path)
+	except OSError:
+		os.remove(path)
+		os.rename(tmppath, path)
+
+
+def loadProject(path):
+	"""Load the compiled model of the API written by saveProject()."""
+	with open(path, 'rb') as f:
+		try:
+			header = pickle.load(f)
+		except (EOFError, pickle.UnpicklingError):
+			header = None
+		if header != ('linphone-api-model', modelVersion()):
+			raise ValueError("'" + path + "' is not an API model written by this version of genapixml.py, generate it again")
+		project = pickle.load(f)
+	project.discoverClasses()
+	return project
+
+
+class RecordsCache:
+	"""On-disk cache of the records extracted from Doxygen XML files. Entries
+	are keyed by the content of the XML file and by the source of this script,
+	so that any change of the parsing code invalidates them."""
+
+	def __init__(self, directory):
+		self.directory = directory
+		if not os.path.isdir(directory):
+			os.makedirs(directory)
+		h = hashlib.sha1(sourceDigest().encode('utf-8'))
+		# Pickled classes are looked up by module name, which differs whether
+		# this script is run or imported
+		h.update((__name__ + sys.version).encode('utf-8'))
+		self.__salt = h.hexdigest()
+
+	def key(self, xmlfile):
+		h = hashlib.sha1(self.__salt.encode('utf-8'))
+		with open(xmlfile, 'rb') as f:
+			h.update(f.read())
+		return h.hexdigest()
+
+	def __path(self, key):
+		return os.path.join(self.directory, key + '.pickle')
+
+	def load(self, key):
+		try:
+			with open(self.__path(key), 'rb') as f:
+				return pickle.load(f)
+		except (IOError, OSError, EOFError, AttributeError, ImportError, pickle.UnpicklingError):
+			return None
+
+	def store(self, key, records):
+		fd, tmppath = tempfile.mkstemp(dir = self.directory)
+		with os.fdopen(fd, 'wb') as f:
+			pickle.dump(records, f, pickle.HIGHEST_PROTOCOL)
+		try:
+			os.rename(tmppath, self.__path(key))
+		except OSError:
+			os.unlink(tmppath)
+
+	def prune(self, keys):
+		# Remove the entries of the files that have been modified or removed
+		keys = set(keys)
+		for f in os.listdir(self.directory):
+			if f.endswith('.pickle') and f[:-len('.pickle')] not in keys:
+				os.unlink(os.path.join(self.directory, f))
+
+
+def _extractFromFile(args):
+	# Extract the records of one file, in a process pool when jobs != 1
+	xmlfile, verbose, streaming = args
+	project = Project()
+	project.verbose = verbose
+	project.streaming = streaming
+	return project.extractFromFiles([xmlfile])
+
+
+class CompactXmlWriter:
+	"""Writes the XML document piece by piece, as ET.tostring() would write
+	the whole tree."""
+
+	def __init__(self, outputfile):
+		self.__outputfile = outputfile
+
+	def startDocument(self):
+		self.__outputfile.write('<?xml version="1.0" encoding="UTF-8" ?>\n'.encode('utf-8'))
+
+	def startElement(self, tag, indent):
+		self.__outputfile.write(('<' + tag + '>').encode('utf-8'))
+
+	def endElement(self, tag, indent):
+		self.__outputfile.write(('</' + tag + '>').encode('utf-8'))
+
+	def emptyElement(self, tag, indent):
+		self.__outputfile.write(('<' + tag + ' />').encode('utf-8'))
+
+	def writeNode(self, node, indent):
+		self.__outputfile.write(ET.tostring(node, 'utf-8'))
+
+
+class PrettyXmlWriter:
+	"""Writes the XML document piece by piece with the indentation of
+	minidom's toprettyxml(), without parsing the document again."""
+
+	def __init__(self, outputfile):
+		self.__outputfile = outputfile
+
+	@staticmethod
+	def __escape(data):
+		return data.replace('&', '&amp;').replace('<', '&lt;').replace('"', '&quot;').replace('>', '&gt;')
+
+	def __serialize(self, node, indent, chunks):
+		chunks.append(indent + '<' + node.tag)
+		attributes = node.items()
+		if sys.version_info < (3, 8):
+			# ElementTree and minidom only keep the order of the attributes since Python 3.8
+			attributes = sorted(attributes)
+		for name, value in attributes:
+			chunks.append(' ' + name + '="' + PrettyXmlWriter.__escape(value) + '"')
+		children = []
+		if node.text:
+			children.append(node.text)
+		for child in node:
+			children.append(child)
+			if child.tail:
+				children.append(child.tail)
+		if len(children) == 0:
+			chunks.append('/>\n')
+			return
+		chunks.append('>')
+		if len(children) == 1 and not ET.iselement(children[0]):
+			chunks.append(PrettyXmlWriter.__escape(children[0]))
+		else:
+			chunks.append('\n')
+			for child in children:
+				if ET.iselement(child):
+					self.__serialize(child, indent + '\t', chunks)
+				else:
+					chunks.append(PrettyXmlWriter.__escape(indent + '\t' + child + '\n'))
+			chunks.append(indent)
+		chunks.append('</' + node.tag + '>\n')
+
+	def startDocument(self):
+		self.__outputfile.write('<?xml version="1.0" ?>\n')
+
+	def startElement(self, tag, indent):
+		self.__outputfile.write(indent + '<' + tag + '>\n')
+
+	def endElement(self, tag, indent):
+		self.__outputfile.write(indent + '</' + tag + '>\n')
+
+	def emptyElement(self, tag, indent):
+		self.__outputfile.write(indent + '<' + tag + '/>\n')
+
+	def writeNode(self, node, indent):
+		chunks = []
+		self.__serialize(node, indent, chunks)
+		self.__outputfile.write(''.join(chunks))
+
+
 class Generator:
 	def __init__(self, outputfile):
 		self.__outputfile = outputfile
 
-	def __generateEnum(self, cenum, enumsNode):
+	def __generateEnum(self, cenum):
 		enumNodeAttributes = { 'name' : cenum.name, 'deprecated' : str(cenum.deprecated).lower() }
 		if cenum.associatedTypedef is not None:
 			enumNodeAttributes['name'] = cenum.associatedTypedef.name
-		enumNode = ET.SubElement(enumsNode, 'enum', enumNodeAttributes)
+		enumNode = ET.Element('enum', enumNodeAttributes)
 		if cenum.briefDescription != '':
 			enumBriefDescriptionNode = ET.SubElement(enumNode, 'briefdescription')
 			enumBriefDescriptionNode.text = cenum.briefDescription
@@ -635,6 +1070,7 @@ class Generator:
 					valueBriefDescriptionNode = ET.SubElement(valueNode, 'briefdescription')
 					valueBriefDescriptionNode.text = value.briefDescription
 				valueNode.append(value.detailedDescription)
+		return enumNode
 
 	def __generateFunction(self, parentNode, nodeName, f):
 		functionAttributes = { 'name' : f.name, 'deprecated' : str(f.deprecated).lower() }
@@ -645,7 +1081,7 @@ class Generator:
 		if f.returnArgument.containedType is not None:
 			returnValueAttributes['containedtype'] = f.returnArgument.containedType
 		returnValueNode = ET.SubElement(functionNode, 'return', returnValueAttributes)
-		if f.returnArgument.description is not None:
+		if f.returnArgument.descriptionRef is not None:
 			returnValueNode.append(f.returnArgument.description)
 		argumentsNode = ET.SubElement(functionNode, 'arguments')
 		for arg in f.arguments:
@@ -653,18 +1089,18 @@ class Generator:
 			if arg.containedType is not None:
 				argumentNodeAttributes['containedtype'] = arg.containedType
 			argumentNode = ET.SubElement(argumentsNode, 'argument', argumentNodeAttributes)
-			if arg.description is not None:
+			if arg.descriptionRef is not None:
 				argumentNode.append(arg.description)
 		if f.briefDescription != '':
 			functionBriefDescriptionNode = ET.SubElement(functionNode, 'briefdescription')
 			functionBriefDescriptionNode.text = f.briefDescription
 		functionNode.append(f.detailedDescription)
 
-	def __generateClass(self, cclass, classesNode):
+	def __generateClass(self, cclass):
 		# Do not include classes that contain nothing
 		if len(cclass.events) == 0 and len(cclass.classMethods) == 0 and \
 			len(cclass.instanceMethods) == 0 and len(cclass.properties) == 0:
-			return
+			return None
 		# Check the capabilities of the class
 		has_ref_method = False
 		has_unref_method = False
@@ -691,7 +1127,7 @@ class Generator:
 			'destroyable' : str(destroyable).lower()
 		}
 		# Generate the XML node for the class
-		classNode = ET.SubElement(classesNode, 'class', classNodeAttributes)
+		classNode = ET.Element('class', classNodeAttributes)
 		if len(cclass.events) > 0:
 			eventsNode = ET.SubElement(classNode, 'events')
 			eventnames = []
@@ -733,25 +1169,42 @@ class Generator:
 			classBriefDescriptionNode = ET.SubElement(classNode, 'briefdescription')
 			classBriefDescriptionNode.text = cclass.briefDescription
 		classNode.append(cclass.detailedDescription)
+		return classNode
+
+	def __writeSection(self, writer, tag, nodes, indent):
+		# The node of each enum or class is written as soon as it is generated,
+		# so that the document is never entirely in memory
+		empty = True
+		for node in nodes:
+			if node is None:
+				continue
+			if empty:
+				writer.startElement(tag, indent)
+				empty = False
+			writer.writeNode(node, indent + '\t')
+		if empty:
+			writer.emptyElement(tag, indent)
+		else:
+			writer.endElement(tag, indent)
 
 	def generate(self, project):
 		print("Generating XML document of Linphone API to '" + self.__outputfile.name + "'")
-		apiNode = ET.Element('api')
+		if project.prettyPrint:
+			writer = PrettyXmlWriter(self.__outputfile)
+		else:
+			writer = CompactXmlWriter(self.__outputfile)
 		project.enums.sort(key = lambda e: e.name)
+		project.classes.sort(key = lambda c: c.name)
+		writer.startDocument()
+		if len(project.enums) == 0 and len(project.classes) == 0:
+			writer.emptyElement('api', '')
+			return
+		writer.startElement('api', '')
 		if len(project.enums) > 0:
-			enumsNode = ET.SubElement(apiNode, 'enums')
-			for cenum in project.enums:
-				self.__generateEnum(cenum, enumsNode)
+			self.__writeSection(writer, 'enums', (self.__generateEnum(cenum) for cenum in project.enums), '\t')
 		if len(project.classes) > 0:
-			classesNode = ET.SubElement(apiNode, 'classes')
-			project.classes.sort(key = lambda c: c.name)
-			for cclass in project.classes:
-				self.__generateClass(cclass, classesNode)
-		s = '<?xml version="1.0" encoding="UTF-8" ?>\n'.encode('utf-8')
-		s += ET.tostring(apiNode, 'utf-8')
-		if project.prettyPrint:
-			s = minidom.parseString(s).toprettyxml(indent='\t')
-		self.__outputfile.write(s)
+			self.__writeSection(writer, 'classes', (self.__generateClass(cclass) for cclass in project.classes), '\t')
+		writer.endElement('api', '')
 
 
 
@@ -762,8 +1215,14 @@ def main(argv = None):
 	argparser.add_argument('-o', '--outputfile', metavar='outputfile', type=argparse.FileType('w'), help="Output XML file describing the Linphone API.")
 	argparser.add_argument('--verbose', help="Increase output verbosity", action='store_true')
 	argparser.add_argument('--pretty', help="XML pretty print", action='store_true')
+	argparser.add_argument('--stream', help="Parse the XML files incrementally to reduce memory usage", action='store_true')
+	argparser.add_argument('-j', '--jobs', metavar='N', type=int, default=1, help="Number of processes used to parse the XML files (0 to use all the CPUs)")
+	argparser.add_argument('--cache-dir', metavar='cachedir', help="Directory where to cache the content extracted from each XML file, so that only modified files are parsed again")
+	argparser.add_argument('--model', metavar='modelfile', help="Also write the compiled API model to this file, which genwrapper.py can load instead of the XML directory")
+	argparser.add_argument('--profile', metavar='reportfile', help="Write the time spent in each phase and the peak memory to this JSON file ('-' for the standard error)")
 	argparser.add_argument('xmldir', help="XML directory generated by doxygen.")
 	args = argparser.parse_args()
+	profile = profiling.Profile('genapixml') if args.profile is not None else profiling.NoProfile()
 	if args.outputfile == None:
 		args.outputfile = open('api.xml', 'w')
 	project = Project()
@@ -771,10 +1230,29 @@ def main(argv = None):
 		project.verbose = True
 	if args.pretty:
 		project.prettyPrint = True
-	project.initFromDir(args.xmldir)
-	project.check()
-	gen = Generator(args.outputfile)
-	gen.generate(project)
+	if args.stream:
+		project.streaming = True
+	project.jobs = args.jobs
+	project.cacheDir = args.cache_dir
+	with profile.phase('xml parse'):
+		project.readDir(args.xmldir)
+	if args.model is not None:
+		with profile.phase('model write'):
+			saveProject(project, args.model)
+	with profile.phase('class discovery'):
+		project.discoverClasses()
+	with profile.phase('check'):
+		project.check()
+	# The descriptions are cleaned and the document is written while it is
+	# generated
+	with profile.phase('generation'):
+		gen = Generator(args.outputfile)
+		gen.generate(project)
+	if args.profile is not None:
+		profile.write(args.profile)
 
 if __name__ == "__main__":
-	sys.exit(main())
+	# Run the code of the genapixml module rather than the one of __main__,
+	# so that the pickled API model can be loaded by the other generators
+	import genapixml
+	sys.exit(genapixml.main())
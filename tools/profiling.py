@@ -0,0 +1,142 @@
+#!/usr/bin/python
+
+# Copyright (C) 2017 Belledonne Communications SARL
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+import json
+import platform
+import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+try:
+	import resource
+except ImportError:
+	# Not available on Windows
+	resource = None
+try:
+	import tracemalloc
+except ImportError:
+	# Python < 3.4
+	tracemalloc = None
+
+
+class Profile(object):
+	"""Records the time spent by a generator in each of its phases and its
+	peak memory, for the JSON report written by the --profile option.
+
+	A phase may be entered several times, eg. once per class, its durations
+	are summed. When tracemalloc is available, it is started with the
+	profile, which slows the generator down a bit.
+	"""
+
+	def __init__(self, tool, traceMemory=True):
+		self.tool = tool
+		self.phases = OrderedDict()
+		self.counts = OrderedDict()
+		self.start = time.time()
+		self.tracingMemory = traceMemory and tracemalloc is not None and not tracemalloc.is_tracing()
+		if self.tracingMemory:
+			tracemalloc.start()
+
+	@contextmanager
+	def phase(self, name):
+		start = time.time()
+		try:
+			yield
+		finally:
+			self.add(name, time.time() - start)
+
+	def add(self, name, duration, count=1):
+		self.phases[name] = self.phases.get(name, 0.0) + duration
+		self.counts[name] = self.counts.get(name, 0) + count
+
+	def merge(self, phases):
+		# Add the phases recorded by a worker process, as (name, duration, count)
+		for name, duration, count in phases:
+			self.add(name, duration, count)
+
+	def items(self):
+		return [(name, self.phases[name], self.counts[name]) for name in self.phases]
+
+	def take(self):
+		# Return the phases recorded so far and forget them
+		items = self.items()
+		self.phases.clear()
+		self.counts.clear()
+		return items
+
+	def worker(self):
+		"""Return the profile of a worker process forked by the generator,
+		whose phases are sent back to the main process with take()."""
+		if self.tracingMemory:
+			tracemalloc.stop()
+		return Profile(self.tool, traceMemory=False)
+
+	def report(self):
+		peak = None
+		if self.tracingMemory:
+			peak = tracemalloc.get_traced_memory()[1]
+		maxrss = None
+		if resource is not None:
+			maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+			if sys.platform != 'darwin':
+				# Kilobytes everywhere but on macOS
+				maxrss *= 1024
+		return OrderedDict([
+			('tool', self.tool),
+			('python', platform.python_version()),
+			('total', time.time() - self.start),
+			('phases', [OrderedDict([('name', name), ('seconds', duration), ('count', count)]) for name, duration, count in self.items()]),
+			('tracemalloc_peak_bytes', peak),
+			('max_rss_bytes', maxrss)
+		])
+
+	def write(self, path):
+		"""Write the report to path, or to the standard error if path is '-'."""
+		report = json.dumps(self.report(), indent=2, separators=(',', ': '))
+		if path == '-':
+			sys.stderr.write(report + '\n')
+		else:
+			with open(path, 'w') as f:
+				f.write(report + '\n')
+		if self.tracingMemory:
+			tracemalloc.stop()
+			self.tracingMemory = False
+
+
+class NoProfile(object):
+	"""Stands for a Profile when --profile is not given."""
+
+	@contextmanager
+	def phase(self, name):
+		yield
+
+	def add(self, name, duration, count=1):
+		pass
+
+	def merge(self, phases):
+		pass
+
+	def items(self):
+		return []
+
+	def take(self):
+		return []
+
+	def worker(self):
+		return self
@@ -18,11 +18,18 @@
 
 import argparse
 import os
-import pystache
 import sys
-import xml.etree.ElementTree as ET
+try:
+	# The C implementation parses api.xml much faster with Python 2, it is the
+	# default one since Python 3.3
+	import xml.etree.cElementTree as ET
+except ImportError:
+	import xml.etree.ElementTree as ET
 
 sys.path.append(os.path.realpath(__file__))
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+import templatecache
+import profiling
 from apixml2python.linphone import LinphoneModule, HandWrittenClassMethod, HandWrittenInstanceMethod, HandWrittenDeallocMethod, HandWrittenProperty
 
 
@@ -106,19 +113,27 @@ hand_written_functions = [
 	HandWrittenInstanceMethod('Factory', 'create_core_with_config', 'linphone_factory_create_core_with_config', "Instantiates a LinphoneCore object with a given LpConfig.\n\n:param cbs: a LinphoneCoreCbs object holding your application callbacks. A reference will be taken on it until the destruciton of the core or the unregistration with linphone_core_remove_cbs().\n:type cbs: linphone.CoreCbs\n:param config: a pointer to an LpConfig object holding the configuration of the LinphoneCore to be instantiated.\n:type config: linphone.Config\n:returns: \n:rtype: linphone.Core"),
 ]
 
-def generate(apixmlfile, outputfile):
-	tree = ET.parse(apixmlfile)
-	renderer = pystache.Renderer()
-	m = LinphoneModule(tree, blacklisted_classes, blacklisted_events, blacklisted_functions, hand_written_functions)
+def generate(apixmlfile, outputfile, profile=None, trace=True, fast_calls=False, limited_api=False):
+	if profile is None:
+		profile = profiling.NoProfile()
+	with profile.phase('xml parse'):
+		tree = ET.parse(apixmlfile)
+	renderer = templatecache.CachedRenderer()
+	with profile.phase('translation'):
+		m = LinphoneModule(tree, blacklisted_classes, blacklisted_events, blacklisted_functions, hand_written_functions, trace, fast_calls, limited_api)
 	os.chdir('apixml2python')
-	tmpfilename = outputfile.name + '.tmp'
-	with open(tmpfilename, mode='w') as f:
-		f.write(renderer.render(m))
-	with open(tmpfilename, mode='rU') as f:
-		for line in f:
-			if not line.isspace():
-				outputfile.write(line)
-	os.unlink(tmpfilename)
+	with profile.phase('template render'):
+		content = renderer.render(m)
+	with profile.phase('file write'):
+		tmpfilename = outputfile.name + '.tmp'
+		with open(tmpfilename, mode='w') as f:
+			f.write(content)
+		# Universal newlines are the default with Python 3, which refuses 'U'
+		with open(tmpfilename, mode='rU' if sys.version_info[0] < 3 else 'r') as f:
+			for line in f:
+				if not line.isspace():
+					outputfile.write(line)
+		os.unlink(tmpfilename)
 
 
 def main(argv = None):
@@ -126,11 +141,23 @@ def main(argv = None):
 		argv = sys.argv
 	argparser = argparse.ArgumentParser(description="Generate a Python wrapper of the Linphone API.")
 	argparser.add_argument('-o', '--outputfile', metavar='outputfile', type=argparse.FileType('w'), help="Output C file containing the code of the Python wrapper.")
+	argparser.add_argument('--profile', metavar='reportfile', help="Write the time spent in each phase and the peak memory to this JSON file ('-' for the standard error)")
+	argparser.add_argument('--no-trace', action='store_true', help="Do not generate the traces of the calls, which linphone.set_trace_enabled() cannot enable then. Makes the module smaller and faster for release builds.")
+	argparser.add_argument('--fast-calls', action='store_true', help="Use the METH_NOARGS, METH_O and METH_FASTCALL calling conventions and convert the arguments and the results directly instead of with PyArg_ParseTuple() and Py_BuildValue().")
+	argparser.add_argument('--limited-api', action='store_true', help="Only use the limited API of Python 3.10, so that the module can be built once for all the later versions (abi3).")
 	argparser.add_argument('apixmlfile', help="XML file of the Linphone API generated by genapixml.py.")
 	args = argparser.parse_args()
 	if args.outputfile == None:
 		args.outputfile = open('linphone.c', 'w')
-	generate(args.apixmlfile, args.outputfile)
+	profile = None
+	if args.profile is not None:
+		profile = profiling.Profile('apixml2python')
+		if args.profile != '-':
+			# generate() changes the current directory
+			args.profile = os.path.abspath(args.profile)
+	generate(args.apixmlfile, args.outputfile, profile, not args.no_trace, args.fast_calls, args.limited_api)
+	if profile is not None:
+		profile.write(args.profile)
 
 if __name__ == "__main__":
 	sys.exit(main())
@@ -40,6 +40,13 @@ def remove_useless_enum_prefix(senum, svalue):
 		return "_None"
 	return svalue
 
+def escape_doc(doc):
+	# The docs go in C string literals, unicode_escape gives bytes with Python 3
+	escaped = doc.encode('unicode_escape')
+	if six.PY3:
+		escaped = escaped.decode('ascii')
+	return escaped
+
 def is_callback(s):
 	return s.startswith('Linphone') and s.endswith('Cb')
 
@@ -297,6 +304,9 @@ class MethodDefinition:
 		self.xml_method_return = None
 		self.xml_method_args = []
 		self.method_type = 'instancemethod'
+		# Set by LinphoneModule for the class and instance methods, see apixml2python.py --fast-calls
+		self.fast_calls = False
+		self.calling_convention = 'METH_VARARGS'
 
 	def format_local_variables_definition(self):
 		body = self.format_local_return_variables_definition()
@@ -335,7 +345,9 @@ class MethodDefinition:
 		if self.self_arg is not None:
 			class_native_ptr_check_code = self.format_class_native_pointer_check(False)
 		parse_tuple_code = ''
-		if len(self.arg_names) > 0:
+		if len(self.arg_names) > 0 and self.calling_convention != 'METH_VARARGS':
+			parse_tuple_code = self.format_arguments_unboxing()
+		elif len(self.arg_names) > 0:
 			parse_tuple_code = \
 """if (!PyArg_ParseTuple(args, "{fmt}", {args})) {{
 		return NULL;
@@ -362,6 +374,50 @@ class MethodDefinition:
 		args_native_ptr_check_code=self.format_args_native_pointer_check(),
 		args_conversion_code=args_conversion_code)
 
+	def format_arguments_unboxing(self):
+		# Convert the arguments of a METH_O or METH_FASTCALL method one by one instead of building a format for PyArg_ParseTuple()
+		lines = []
+		if self.calling_convention == 'METH_O':
+			items = ['arg']
+		else:
+			items = ['args[' + str(i) + ']' for i in range(len(self.arg_names))]
+			lines.append(\
+"""if (nargs != {count}) {{
+		PyErr_Format(PyExc_TypeError, "{method_name}() takes exactly {count} argument{plural} (%d given)", (int)nargs);
+		return NULL;
+	}}""".format(count=len(self.arg_names), method_name=self.method_name, plural='s' if len(self.arg_names) > 1 else ''))
+		for xml_method_arg, arg_name, fmt, item in zip(self.xml_method_args, self.arg_names, self.parse_tuple_format, items):
+			if fmt == 'O':
+				lines.append("{arg_name} = {item};".format(arg_name=arg_name, item=item))
+			elif fmt == 'z':
+				lines.append("{arg_name} = ({arg_type})pylinphone_unbox_string({item});".format(arg_name=arg_name, arg_type=xml_method_arg.get('completetype'), item=item))
+				lines.append("if (({arg_name} == NULL) && PyErr_Occurred()) return NULL;".format(arg_name=arg_name))
+			elif fmt == 'i':
+				lines.append("{arg_name} = pylinphone_unbox_int({item});".format(arg_name=arg_name, item=item))
+				lines.append("if (({arg_name} == -1) && PyErr_Occurred()) return NULL;".format(arg_name=arg_name))
+			else:
+				lines.append("if (!PyArg_Parse({item}, \"{fmt}\", &{arg_name})) return NULL;".format(item=item, fmt=fmt, arg_name=arg_name))
+		return '\n\t'.join(lines) + '\n'
+
+	def format_build_value(self, result_variable, take_native_ref):
+		# Without --fast-calls or for the less common formats, Py_BuildValue() is used
+		if self.linphone_module.fast_calls:
+			if self.build_value_format == 'O':
+				if take_native_ref == 'FALSE':
+					return "pyret = {result_variable};".format(result_variable=result_variable)
+				return "pyret = {result_variable};\n\tPy_XINCREF(pyret);".format(result_variable=result_variable)
+			elif self.build_value_format in ['b', 'h', 'i', 'l']:
+				return "pyret = PyInt_FromLong((long){result_variable});".format(result_variable=result_variable)
+			elif self.build_value_format in ['f', 'd']:
+				return "pyret = PyFloat_FromDouble((double){result_variable});".format(result_variable=result_variable)
+			elif self.build_value_format == 'z':
+				return "pyret = pylinphone_box_string({result_variable});".format(result_variable=result_variable)
+		build_value_code = "pyret = Py_BuildValue(\"{fmt}\", {result_variable});".format(fmt=self.build_value_format, result_variable=result_variable)
+		if take_native_ref == 'FALSE':
+			build_value_code += """
+	Py_XDECREF(pyresult);"""
+		return build_value_code
+
 	def format_enter_trace(self):
 		fmt = ''
 		args = []
@@ -425,6 +481,10 @@ class MethodDefinition:
 			python_ref_code = "Py_INCREF(_cbs);"
 		elif self.method_name == 'remove_callbacks':
 			python_ref_code = "Py_XDECREF(_cbs);"
+		flush_logs_code = ''
+		if self.method_node.get('name') == 'linphone_core_iterate':
+			# Deliver the logs queued since the previous iteration, see linphone.set_log_queue()
+			flush_logs_code = "pylinphone_flush_logs();"
 		from_native_pointer_code = ''
 		convert_from_code = ''
 		build_value_code = ''
@@ -453,10 +513,7 @@ class MethodDefinition:
 			else:
 				result_variable = 'cresult'
 		if result_variable != '':
-			build_value_code = "pyret = Py_BuildValue(\"{fmt}\", {result_variable});".format(fmt=self.build_value_format, result_variable=result_variable)
-			if take_native_ref == 'FALSE':
-				build_value_code += """
-	Py_XDECREF(pyresult);"""
+			build_value_code = self.format_build_value(result_variable, take_native_ref)
 		if self.return_complete_type == 'char *':
 			cfree_code = 'ms_free(cresult);';
 		body = \
@@ -464,6 +521,7 @@ class MethodDefinition:
 	{cfree_argument_code}
 	{python_ref_code}
 	pylinphone_dispatch_messages();
+	{flush_logs_code}
 	{from_native_pointer_code}
 	{convert_from_code}
 	{build_value_code}
@@ -471,6 +529,7 @@ class MethodDefinition:
 """.format(c_function_call_code=c_function_call_code,
 		cfree_argument_code=cfree_argument_code,
 		python_ref_code=python_ref_code,
+		flush_logs_code=flush_logs_code,
 		from_native_pointer_code=from_native_pointer_code,
 		convert_from_code=convert_from_code,
 		build_value_code=build_value_code,
@@ -489,6 +548,8 @@ class MethodDefinition:
 		return "\tPy_RETURN_NONE;"
 
 	def format_return_none_trace(self):
+		if not self.linphone_module.trace:
+			return ''
 		return "\tpylinphone_trace(-1, \"[PYLINPHONE] <<< %s -> None\", __FUNCTION__);\n"
 
 	def format_class_native_pointer_check(self, return_int):
@@ -597,12 +658,21 @@ class MethodDefinition:
 
 	def format(self):
 		self.parse_method_node()
+		if self.fast_calls:
+			if len(self.xml_method_args) == 0:
+				self.calling_convention = 'METH_NOARGS'
+			elif len(self.xml_method_args) == 1:
+				self.calling_convention = 'METH_O'
+			else:
+				self.calling_convention = 'PYLINPHONE_METH_FASTCALL'
 		body = self.format_local_variables_definition()
 		body += self.format_deprecation_warning()
 		body += self.format_arguments_parsing()
-		body += self.format_enter_trace()
+		if self.linphone_module.trace:
+			body += self.format_enter_trace()
 		body += self.format_c_function_call()
-		body += self.format_return_trace()
+		if self.linphone_module.trace:
+			body += self.format_return_trace()
 		body += self.format_return_result()
 		return body
 
@@ -611,7 +681,7 @@ class NewMethodDefinition(MethodDefinition):
 		MethodDefinition.__init__(self, linphone_module, class_, "new", method_node)
 
 	def format_local_variables_definition(self):
-		return "\tpylinphone_{class_name}Object *self = (pylinphone_{class_name}Object *)type->tp_alloc(type, 0);\n".format(class_name=self.class_['class_name'])
+		return "\tpylinphone_{class_name}Object *self = (pylinphone_{class_name}Object *)pylinphone_tp_alloc(type);\n".format(class_name=self.class_['class_name'])
 
 	def format_arguments_parsing(self):
 		return ''
@@ -753,7 +823,7 @@ class DeallocMethodDefinition(MethodDefinition):
 	pylinphone_dispatch_messages();
 	Py_XDECREF(((pylinphone_{class_name}Object *)self)->user_data);
 {specific_member_decref_code}
-	self->ob_type->tp_free(self);
+	pylinphone_tp_free(self);
 """.format(class_name=self.class_['class_name'], reset_user_data_code=reset_user_data_code, native_ptr_dealloc_code=native_ptr_dealloc_code, specific_member_decref_code=specific_member_decref_code)
 
 	def format_return_trace(self):
@@ -992,7 +1062,7 @@ class EventCallbackMethodDefinition(MethodDefinition):
 """	if ((func != NULL) && PyCallable_Check(func)) {{
 {create_python_objects_code}
 		args = Py_BuildValue("{fmt}", {args});
-		pyresult = PyEval_CallObject(func, args);
+		pyresult = PyObject_CallObject(func, args);
 		if (pyresult == NULL) {{
 			PyErr_Print();
 		}}
@@ -1041,7 +1111,13 @@ class EventCallbackMethodDefinition(MethodDefinition):
 
 
 class LinphoneModule(object):
-	def __init__(self, tree, blacklisted_classes, blacklisted_events, blacklisted_functions, hand_written_codes):
+	def __init__(self, tree, blacklisted_classes, blacklisted_events, blacklisted_functions, hand_written_codes, trace = True, fast_calls = False, limited_api = False):
+		# Whether the calls traces are generated, see apixml2python.py --no-trace
+		self.trace = trace
+		# Whether the METH_NOARGS, METH_O and METH_FASTCALL calling conventions are used, see apixml2python.py --fast-calls
+		self.fast_calls = fast_calls
+		# Whether the module only uses the limited API of Python 3.10, see apixml2python.py --limited-api
+		self.limited_api = limited_api
 		self.known_types = ['char', 'int', 'int8_t', 'int16_t', 'int32_t', 'int64_t', 'uint8_t', 'uint16_t', 'uint32_t', 'uint64_t', 'bool_t', 'float', 'double', 'size_t', 'time_t', 'MSList', 'bctbx_list_t', 'MSVideoSize', 'LCSipTransports', 'PayloadType']
 		self.internal_instance_method_names = ['destroy', 'ref', 'unref']
 		self.internal_property_names = ['user_data']
@@ -1049,6 +1125,7 @@ class LinphoneModule(object):
 		self.enums = []
 		self.enum_names = []
 		self.cfunction2methodmap = {}
+		self.cfunction2method_items = []
 		hand_written_functions = []
 		for hand_written_code in hand_written_codes:
 			hand_written_functions += hand_written_code.func_list
@@ -1086,7 +1163,7 @@ class LinphoneModule(object):
 					v['enum_value_doc'] = self.__format_doc(xml_enum_value.find('briefdescription'), xml_enum_value.find('detaileddescription'))
 					e['enum_deprecated_values'].append(v)
 			e['enum_doc'] = self.__replace_doc_special_chars(e['enum_doc'])
-			e['enum_doc'] = e['enum_doc'].encode('unicode_escape')
+			e['enum_doc'] = escape_doc(e['enum_doc'])
 			self.enums.append(e)
 			self.enum_names.append(e['enum_name'])
 			self.known_types.append(e['enum_cname'])
@@ -1102,7 +1179,7 @@ class LinphoneModule(object):
 			c['class_name'] = strip_leading_linphone(c['class_cname'])
 			c['class_c_function_prefix'] = xml_class.get('cfunctionprefix')
 			c['class_doc'] = self.__format_doc(xml_class.find('briefdescription'), xml_class.find('detaileddescription'))
-			c['class_doc'] = c['class_doc'].encode('unicode_escape')
+			c['class_doc'] = escape_doc(c['class_doc'])
 			c['class_refcountable'] = (xml_class.get('refcountable') == 'true')
 			c['class_destroyable'] = (xml_class.get('destroyable') == 'true')
 			c['class_has_user_data'] = False
@@ -1123,7 +1200,7 @@ class LinphoneModule(object):
 				ev['event_cname'] = xml_event.get('name')
 				ev['event_name'] = compute_event_name(ev['event_cname'], c['class_name'])
 				ev['event_doc'] = self.__format_doc(xml_event.find('briefdescription'), xml_event.find('detaileddescription'))
-				ev['event_doc'] = ev['event_doc'].encode('unicode_escape')
+				ev['event_doc'] = escape_doc(ev['event_doc'])
 				c['class_events'].append(ev)
 				self.known_types.append(ev['event_cname'])
 				c['class_object_members'].append(ev['event_name'])
@@ -1134,13 +1211,13 @@ class LinphoneModule(object):
 						m = {}
 						m['method_name'] = hand_written_code.name
 						m['method_doc'] = self.__replace_doc_special_chars(hand_written_code.doc)
-						m['method_doc'] = m['method_doc'].encode('unicode_escape')
+						m['method_doc'] = escape_doc(m['method_doc'])
 						c['class_type_hand_written_methods'].append(m)
 					elif isinstance(hand_written_code, HandWrittenInstanceMethod):
 						m = {}
 						m['method_name'] = hand_written_code.name
 						m['method_doc'] = self.__replace_doc_special_chars(hand_written_code.doc)
-						m['method_doc'] = m['method_doc'].encode('unicode_escape')
+						m['method_doc'] = escape_doc(m['method_doc'])
 						c['class_instance_hand_written_methods'].append(m)
 					elif isinstance(hand_written_code, HandWrittenDeallocMethod):
 						c['class_has_hand_written_dealloc'] = True
@@ -1156,7 +1233,7 @@ class LinphoneModule(object):
 						else:
 							p['setter_reference'] = '(setter)pylinphone_' + c['class_name'] + '_set_' + p['property_name']
 						p['property_doc'] = self.__replace_doc_special_chars(hand_written_code.doc)
-						p['property_doc'] = p['property_doc'].encode('unicode_escape')
+						p['property_doc'] = escape_doc(p['property_doc'])
 						c['class_hand_written_properties'].append(p)
 			xml_type_methods = xml_class.findall("./classmethods/classmethod")
 			for xml_type_method in xml_type_methods:
@@ -1257,9 +1334,12 @@ class LinphoneModule(object):
 				raise
 			for m in c['class_type_methods']:
 				try:
-					m['method_body'] = MethodDefinition(self, c, m['method_name'], m['method_xml_node']).format()
+					method_definition = MethodDefinition(self, c, m['method_name'], m['method_xml_node'])
+					method_definition.fast_calls = self.fast_calls
+					m['method_body'] = method_definition.format()
+					self.__format_method_entry(c, m, method_definition, 'class', 'cls')
 					m['method_doc'] = self.__format_method_doc(m['method_xml_node'])
-					m['method_doc'] = m['method_doc'].encode('unicode_escape')
+					m['method_doc'] = escape_doc(m['method_doc'])
 				except (UnknownTypeException) as e:
 					print(e)
 					m['blacklisted'] = True
@@ -1268,9 +1348,12 @@ class LinphoneModule(object):
 					raise
 			for m in c['class_instance_methods']:
 				try:
-					m['method_body'] = MethodDefinition(self, c, m['method_name'], m['method_xml_node']).format()
+					method_definition = MethodDefinition(self, c, m['method_name'], m['method_xml_node'])
+					method_definition.fast_calls = self.fast_calls
+					m['method_body'] = method_definition.format()
+					self.__format_method_entry(c, m, method_definition, 'instance', 'self')
 					m['method_doc'] = self.__format_method_doc(m['method_xml_node'])
-					m['method_doc'] = m['method_doc'].encode('unicode_escape')
+					m['method_doc'] = escape_doc(m['method_doc'])
 				except (UnknownTypeException) as e:
 					print(e)
 					m['blacklisted'] = True
@@ -1300,7 +1383,7 @@ class LinphoneModule(object):
 					except (Exception) as e:
 						e.args += (c['class_name'], p['property_name'])
 						raise
-				p['property_doc'] = p['property_doc'].encode('unicode_escape')
+				p['property_doc'] = escape_doc(p['property_doc'])
 			if not 'class_has_hand_written_dealloc' in c:
 				try:
 					if c['class_refcountable']:
@@ -1325,7 +1408,7 @@ class LinphoneModule(object):
 			c['class_properties'] = [m for m in c['class_properties'] if not 'blacklisted' in m]
 		# Convert bctbxlist_types to a list of dictionaries for the template
 		d = []
-		for bctbxlist_type in self.bctbxlist_types:
+		for bctbxlist_type in sorted(self.bctbxlist_types):
 			t = {}
 			t['c_contained_type'] = bctbxlist_type
 			t['python_contained_type'] = strip_leading_linphone(bctbxlist_type)
@@ -1360,6 +1443,8 @@ class LinphoneModule(object):
 		doc = ''
 		if brief_description is None:
 			brief_description = ''
+		else:
+			brief_description = ''.join(brief_description.itertext())
 		if detailed_description is None:
 			detailed_description = ''
 		else:
@@ -1379,9 +1464,13 @@ class LinphoneModule(object):
 		return doc.replace('"', '') #.encode('utf-8') #.encode('unicode_escape')
 
 	def __replace_doc_cfunction_by_method(self, doc):
-		for cfunction, method in six.iteritems(self.cfunction2methodmap):
+		# The longest names are replaced first so that eg. linphone_core_get_video_device does not become
+		# :py:attr:`linphone.Core.video_dev`ice, whatever the order of the dictionary. The map only grows.
+		if len(self.cfunction2method_items) != len(self.cfunction2methodmap):
+			self.cfunction2method_items = sorted(six.iteritems(self.cfunction2methodmap), reverse=True)
+		for cfunction, method in self.cfunction2method_items:
 			doc = doc.replace(cfunction + '()', method)
-		for cfunction, method in six.iteritems(self.cfunction2methodmap):
+		for cfunction, method in self.cfunction2method_items:
 			doc = doc.replace(cfunction, method)
 		return doc
 
@@ -1395,6 +1484,20 @@ class LinphoneModule(object):
 		doc = self.__replace_doc_special_chars(doc)
 		return doc
 
+	def __format_method_entry(self, c, m, method_definition, method_kind, self_name):
+		function_name = "pylinphone_{class_name}_{method_kind}_method_{method_name}".format(class_name=c['class_name'], method_kind=method_kind, method_name=m['method_name'])
+		m['method_flags'] = method_definition.calling_convention
+		m['method_entry'] = function_name
+		m['method_fastcall'] = False
+		if method_definition.calling_convention == 'METH_O':
+			m['method_parameters'] = "PyObject *{self_name}, PyObject *arg".format(self_name=self_name)
+		elif method_definition.calling_convention == 'PYLINPHONE_METH_FASTCALL':
+			m['method_parameters'] = "PyObject *{self_name}, PyObject *const *args, Py_ssize_t nargs".format(self_name=self_name)
+			m['method_entry'] = "PYLINPHONE_FASTCALL_ENTRY({function_name})".format(function_name=function_name)
+			m['method_fastcall'] = True
+		else:
+			m['method_parameters'] = "PyObject *{self_name}, PyObject *args".format(self_name=self_name)
+
 	def __format_method_doc(self, xml_node):
 		doc = self.__format_doc_content(xml_node.find('briefdescription'), xml_node.find('detaileddescription'))
 		xml_method_return = xml_node.find('./return')
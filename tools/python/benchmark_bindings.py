@@ -0,0 +1,108 @@
+#!/usr/bin/python
+
+# Copyright (C) 2017 Belledonne Communications SARL
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""Micro-benchmarks of the calls to the linphone Python module generated by
+apixml2python.py. The module must be importable, eg. installed or in
+PYTHONPATH."""
+
+import argparse
+import sys
+import timeit
+
+import linphone
+
+
+def measure(func, number, repeat):
+	"""Best time of one call of func in nanoseconds, without the time of the
+	call of an empty function."""
+	empty = min(timeit.repeat(lambda: None, number = number, repeat = repeat))
+	best = min(timeit.repeat(func, number = number, repeat = repeat))
+	return max(0, best - empty) * 1e9 / number
+
+
+def discard_log(level, msg):
+	pass
+
+
+def tracing_benchmark(args):
+	# A Call would need a running call, the getters of the Address are
+	# generated the same way as Call.state
+	address = linphone.Factory.get().create_address('sip:user@sip.example.org')
+	get_username = lambda: address.username
+	results = []
+	try:
+		linphone.set_trace_enabled(False)
+		linphone.set_log_handler(None)
+		results.append(('no log handler', measure(get_username, args.number, args.repeat)))
+		linphone.set_log_handler(discard_log)
+		results.append(('log handler, traces disabled', measure(get_username, args.number, args.repeat)))
+		linphone.set_trace_enabled(True)
+		results.append(('log handler, traces enabled', measure(get_username, args.number, args.repeat)))
+	finally:
+		linphone.set_trace_enabled(False)
+		linphone.set_log_handler(None)
+	print("Address.username, best of {0} runs of {1} calls, in ns per call".format(args.repeat, args.number))
+	for name, ns in results:
+		print("{0:>30}: {1:8.0f}".format(name, ns))
+	return 0
+
+
+def calls_benchmark(args):
+	# Build the module with and without apixml2python.py --fast-calls to
+	# compare the calling conventions
+	factory = linphone.Factory.get()
+	core = factory.create_core(factory.create_core_cbs(), None, None)
+	address = factory.create_address('sip:user@sip.example.org')
+	other = factory.create_address('sip:other@sip.example.org')
+	calls = [
+		('Core.iterate()', lambda: core.iterate()),
+		('Address.as_string()', lambda: address.as_string()),
+		('Address.equal(other)', lambda: address.equal(other)),
+		('Address.set_header(name, value)', lambda: address.set_header('X-Benchmark', 'value')),
+		# A Call would need a running call, its state getter is generated
+		# the same way as the port one
+		('Address.port', lambda: address.port),
+		('Address.username', lambda: address.username)
+	]
+	print("Best of {0} runs of {1} calls, in ns per call".format(args.repeat, args.number))
+	for name, func in calls:
+		print("{0:>32}: {1:8.0f}".format(name, measure(func, args.number, args.repeat)))
+	return 0
+
+
+def main(argv = None):
+	if argv is None:
+		argv = sys.argv
+	argparser = argparse.ArgumentParser(description="Benchmark the calls to the linphone Python module.")
+	subparsers = argparser.add_subparsers(dest='command')
+	tracing_parser = subparsers.add_parser('tracing', help="Measure the cost of the call traces on a property access.")
+	tracing_parser.add_argument('--number', type=int, default=100000, help="Number of calls per run")
+	tracing_parser.add_argument('--repeat', type=int, default=5, help="Number of runs, the best one is reported")
+	calls_parser = subparsers.add_parser('calls', help="Measure the cost of common method calls and property accesses.")
+	calls_parser.add_argument('--number', type=int, default=100000, help="Number of calls per run")
+	calls_parser.add_argument('--repeat', type=int, default=5, help="Number of runs, the best one is reported")
+	args = argparser.parse_args(argv[1:])
+	if args.command == 'tracing':
+		return tracing_benchmark(args)
+	elif args.command == 'calls':
+		return calls_benchmark(args)
+	argparser.print_help()
+	return 1
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -5,6 +5,12 @@ import threading
 import time
 import linphone
 
+try:
+	# Python 2, where input() evaluates what is typed
+	input = raw_input
+except NameError:
+	pass
+
 
 class Response:
 	Ok = 0
@@ -412,7 +418,7 @@ class Daemon:
 			self.send_response(Response(Response.Error, "Unknown command."))
 
 	def interact(self):
-		command_line = raw_input('> ').strip()
+		command_line = input('> ').strip()
 		if command_line != '':
 			self.command_mutex.acquire()
 			self.command_to_execute = command_line
@@ -457,7 +463,7 @@ class Daemon:
 		return id
 
 	def find_proxy(self, id):
-		if self.proxy_ids_map.has_key(id):
+		if id in self.proxy_ids_map:
 			return self.proxy_ids_map[id]
 		return None
 
@@ -468,7 +474,7 @@ class Daemon:
 		return id
 
 	def find_call(self, id):
-		if self.call_ids_map.has_key(id):
+		if id in self.call_ids_map:
 			return self.call_ids_map[id]
 		return None
 
@@ -507,6 +513,7 @@ def main(argv = None):
 	args = argparser.parse_args()
 	setup_log(args.log, args.trace)
 	linphone.set_log_handler(log_handler)
+	linphone.set_trace_enabled(args.trace)
 	d = Daemon()
 	d.run(args)
 
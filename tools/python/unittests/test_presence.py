@@ -1,4 +1,3 @@
-from nose.tools import assert_equals
 from copy import deepcopy
 import linphone
 from linphonetester import *
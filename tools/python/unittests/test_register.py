@@ -1,4 +1,3 @@
-from nose.tools import assert_equals
 import linphone
 from linphonetester import *
 import os
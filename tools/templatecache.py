@@ -0,0 +1,59 @@
+#!/usr/bin/python
+
+# Copyright (C) 2017 Belledonne Communications SARL
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+
+import os
+import pystache
+from pystache.common import is_string
+from pystache.locator import Locator
+from pystache.parsed import ParsedTemplate
+from pystache.template_spec import TemplateSpec
+
+
+class CachedRenderer(pystache.Renderer):
+	"""A pystache.Renderer which parses the template associated to a class of
+	views once, instead of locating, reading and parsing it for each view.
+
+	A template is parsed again when the modification time of its file
+	changes.
+	"""
+
+	def __init__(self, *args, **kwargs):
+		pystache.Renderer.__init__(self, *args, **kwargs)
+		self.templates = {}
+		self.parsings = 0
+
+	def render(self, template, *context, **kwargs):
+		if is_string(template) or isinstance(template, (ParsedTemplate, TemplateSpec)):
+			return pystache.Renderer.render(self, template, *context, **kwargs)
+		return pystache.Renderer.render(self, self.template_of(template), template, *context, **kwargs)
+
+	def template_of(self, view):
+		entry = self.templates.get(type(view))
+		if entry is None:
+			locator = Locator(extension=self.file_extension)
+			path = os.path.abspath(locator.find_object(view, self.search_dirs))
+		else:
+			path = entry[0]
+		mtime = os.stat(path).st_mtime
+		if entry is None or entry[1] != mtime:
+			loader = self._make_loader()
+			entry = (path, mtime, pystache.parse(loader.read(path)))
+			self.templates[type(view)] = entry
+			self.parsings += 1
+		return entry[2]
@@ -28,13 +28,40 @@ class BlacklistedException(Error):
 
 
 class Name(object):
+	"""Name of an API item, made of words and of the name of its namespace
+	(prev). The renderings of a name are memoized, so a name must not be
+	modified once it has been rendered: words and prev may only be assigned
+	while the name is being built."""
 	camelCaseParsingRegex = re.compile('[A-Z][a-z0-9]*')
 	lowerCamelCaseSplitingRegex = re.compile('([a-z][a-z0-9]*)([A-Z][a-z0-9]*)')
 	
 	def __init__(self):
+		self._renderings = {}
 		self.words = []
 		self.prev = None
 	
+	def _check_mutable(self):
+		if len(self._renderings) > 0:
+			raise Error('name \'{0}\' cannot be modified once rendered'.format('_'.join(self._words)))
+	
+	def _get_words(self):
+		return self._words
+	
+	def _set_words(self, words):
+		self._check_mutable()
+		self._words = words
+	
+	words = property(fget=_get_words, fset=_set_words)
+	
+	def _get_prev(self):
+		return self._prev
+	
+	def _set_prev(self, prev):
+		self._check_mutable()
+		self._prev = prev
+	
+	prev = property(fget=_get_prev, fset=_set_prev)
+	
 	def copy(self):
 		nameType = type(self)
 		name = nameType()
@@ -67,10 +94,7 @@ class Name(object):
 				self.words = self.words[i:]
 	
 	def _lower_all_words(self):
-		i = 0
-		while i<len(self.words):
-			self.words[i] = self.words[i].lower()
-			i += 1
+		self.words = [word.lower() for word in self.words]
 	
 	def from_snake_case(self, name, namespace=None):
 		self.words = name.split('_')
@@ -88,37 +112,46 @@ class Name(object):
 		Name._set_namespace(self, namespace)
 	
 	def to_snake_case(self, fullName=False, upper=False):
-		if self.prev is None or not fullName:
-			res = '_'.join(self.words)
-			if upper:
-				res = res.upper()
-			return res
-		else:
-			return Name.to_snake_case(self.prev, fullName=True, upper=upper) + '_' + Name.to_snake_case(self, upper=upper)
+		key = ('snake', fullName and self._prev is not None, upper)
+		res = self._renderings.get(key)
+		if res is None:
+			if self._prev is None or not fullName:
+				res = '_'.join(self._words)
+				if upper:
+					res = res.upper()
+			else:
+				res = Name.to_snake_case(self._prev, fullName=True, upper=upper) + '_' + Name.to_snake_case(self, upper=upper)
+			self._renderings[key] = res
+		return res
 	
 	def to_camel_case(self, lower=False, fullName=False):
-		if self.prev is None or not fullName:
-			res = ''
-			for elem in self.words:
-				if elem is self.words[0] and lower:
-					res += elem
-				else:
-					res += elem.title()
-			return res
-		else:
-			return Name.to_camel_case(self.prev, fullName=True, lower=lower) + Name.to_camel_case(self)
+		key = ('camel', fullName and self._prev is not None, lower)
+		res = self._renderings.get(key)
+		if res is None:
+			if self._prev is None or not fullName:
+				res = ''
+				for elem in self._words:
+					if elem is self._words[0] and lower:
+						res += elem
+					else:
+						res += elem.title()
+			else:
+				res = Name.to_camel_case(self._prev, fullName=True, lower=lower) + Name.to_camel_case(self)
+			self._renderings[key] = res
+		return res
 	
 	def concatenate(self, upper=False, fullName=False):
-		if self.prev is None or not fullName:
-			res = ''
-			for elem in self.words:
+		key = ('concatenate', fullName and self._prev is not None, upper)
+		res = self._renderings.get(key)
+		if res is None:
+			if self._prev is None or not fullName:
+				res = ''.join(self._words)
 				if upper:
-					res += elem.upper()
-				else:
-					res += elem
-			return res
-		else:
-			return Name.concatenate(self.prev, upper=upper, fullName=True) + Name.concatenate(self, upper=upper)
+					res = res.upper()
+			else:
+				res = Name.concatenate(self._prev, upper=upper, fullName=True) + Name.concatenate(self, upper=upper)
+			self._renderings[key] = res
+		return res
 	
 	def to_word_list(self):
 		if self.prev is None:
@@ -162,6 +195,7 @@ class MethodName(Name):
 	regex = re.compile('^\d+$')
 	
 	def __init__(self):
+		Name.__init__(self)
 		self.overloadRef = 0
 	
 	def from_snake_case(self, name, namespace=None):
@@ -170,7 +204,7 @@ class MethodName(Name):
 			suffix = self.words[-1]
 			if MethodName.regex.match(suffix) is not None:
 				self.overloadRef = int(suffix)
-				del self.words[-1]
+				self.words = self.words[:-1]
 	
 	def to_c(self):
 		suffix = ('_' + str(self.overloadRef)) if self.overloadRef > 0 else ''
@@ -446,18 +480,25 @@ class Interface(DocumentableObject):
 
 
 class CParser(object):
+	regexFixedSizeInteger = re.compile('^(u?)int(\d?\d)_t$')
+	
 	def __init__(self, cProject):
-		self.cBaseType = ['void', 'bool_t', 'char', 'short', 'int', 'long', 'size_t', 'time_t', 'float', 'double', 'LinphoneStatus']
+		self.cBaseType = frozenset(['void', 'bool_t', 'char', 'short', 'int', 'long', 'size_t', 'time_t', 'float', 'double', 'LinphoneStatus'])
 		self.cListType = 'bctbx_list_t'
-		self.regexFixedSizeInteger = '^(u?)int(\d?\d)_t$'
-		self.methodBl = ['ref', 'unref', 'new', 'destroy', 'getCurrentCallbacks', 'setUserData', 'getUserData']
-		self.functionBl = [
+		self.methodBl = frozenset(['ref', 'unref', 'new', 'destroy', 'getCurrentCallbacks', 'setUserData', 'getUserData'])
+		self.functionBl = frozenset([
 					   'linphone_factory_create_core', # manualy wrapped
 					   'linphone_factory_create_core_with_config', # manualy wrapped
-					   'linphone_vcard_get_belcard'] # manualy wrapped
+					   'linphone_vcard_get_belcard']) # manualy wrapped
 
-		self.classBl = ['LpConfig',
-					   'LinphonePlayer']  # temporarly blacklisted
+		self.classBl = frozenset(['LpConfig',
+					   'LinphonePlayer'])  # temporarly blacklisted
+		
+		# The same C types come back for many arguments, so whether a type is a
+		# base type and how a base type declaration is parsed are memoized. The
+		# type objects themselves are built for each call as they get a parent.
+		self.baseTypesIndex = {}
+		self.baseTypeDeclsIndex = {}
 		
 		# list of classes that must be concidered as refcountable even if
 		# they are no ref()/unref() methods
@@ -495,6 +536,10 @@ class CParser(object):
 			return False
 		
 	def parse_all(self):
+		self.parse_enums_and_classes()
+		self.fix_all_types()
+	
+	def parse_enums_and_classes(self):
 		for enum in self.cProject.enums:
 			try:
 				self.parse_enum(enum)
@@ -508,8 +553,6 @@ class CParser(object):
 				pass
 			except Error as e:
 				print('Could not parse \'{0}\' class: {1}'.format(_class.name, e.args[0]))
-				
-		self._fix_all_types()
 	
 	
 	def _class_is_refcountable(self, _class):
@@ -528,7 +571,7 @@ class CParser(object):
 			else:
 				self._fix_all_types_in_interface(_class)
 	
-	def _fix_all_types(self):
+	def fix_all_types(self):
 		for _class in self.interfacesIndex.values():
 			self._fix_all_types_in_class_or_interface(_class)
 		for _class in self.classesIndex.values():
@@ -681,7 +724,7 @@ class CParser(object):
 		name.from_camel_case(cclass.name, namespace=self.namespace.name)
 		
 		if name.words[len(name.words)-1] == 'cbs':
-			name.words[len(name.words)-1] = 'listener'
+			name.words = name.words[:-1] + ['listener']
 		else:
 			raise Error('{0} is not a listener'.format(cclass.name))
 		
@@ -700,7 +743,7 @@ class CParser(object):
 	def _parse_listener_property(self, property, listener, events):
 		methodName = MethodName()
 		methodName.from_snake_case(property.name)
-		methodName.words.insert(0, 'on')
+		methodName.words = ['on'] + methodName.words
 		methodName.prev = listener.name
 		
 		if property.getter is not None:
@@ -748,8 +791,15 @@ class CParser(object):
 		
 		return method
 	
+	def _is_base_type(self, ctype):
+		isBaseType = self.baseTypesIndex.get(ctype)
+		if isBaseType is None:
+			isBaseType = ctype in self.cBaseType or CParser.regexFixedSizeInteger.match(ctype) is not None
+			self.baseTypesIndex[ctype] = isBaseType
+		return isBaseType
+	
 	def parse_type(self, cType):
-		if cType.ctype in self.cBaseType or re.match(self.regexFixedSizeInteger, cType.ctype):
+		if self._is_base_type(cType.ctype):
 			absType = self.parse_c_base_type(cType.completeType)
 		elif cType.ctype in self.enumsIndex:
 			absType = EnumType(cType.ctype, enumDesc=self.enumsIndex[cType.ctype])
@@ -766,6 +816,19 @@ class CParser(object):
 		return absType
 	
 	def parse_c_base_type(self, cDecl):
+		decl = self.baseTypeDeclsIndex.get(cDecl)
+		if decl is None:
+			try:
+				decl = self._parse_c_base_type_decl(cDecl)
+			except Error as e:
+				decl = e
+			self.baseTypeDeclsIndex[cDecl] = decl
+		if isinstance(decl, Error):
+			raise Error(*decl.args)
+		name, param = decl
+		return BaseType(name, **param)
+	
+	def _parse_c_base_type_decl(self, cDecl):
 		declElems = cDecl.split(' ')
 		param = {}
 		name = None
@@ -811,7 +874,7 @@ class CParser(object):
 					else:
 						raise Error('Unhandled double-pointer')
 			else:
-				matchCtx = re.match(self.regexFixedSizeInteger, elem)
+				matchCtx = CParser.regexFixedSizeInteger.match(elem)
 				if matchCtx:
 					name = 'integer'
 					if matchCtx.group(1) == 'u':
@@ -823,6 +886,6 @@ class CParser(object):
 		
 		
 		if name is not None:
-			return BaseType(name, **param)
+			return (name, param)
 		else:
 			raise Error('could not find type in \'{0}\''.format(cDecl))
@@ -17,23 +17,38 @@
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
 
-import pystache
 import re
 import argparse
 import os
 import sys
 import errno
+import io
+import multiprocessing
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'tools'))
 import genapixml as CApi
+import templatecache
+import profiling
 import abstractapi as AbsApi
 
 
 class CppTranslator(object):
 	sharedPtrTypeExtractor = re.compile('^(const )?std::shared_ptr<(.+)>( &)?$')
 	
-	def __init__(self):
+	def __init__(self, listContainer='list', lazyLists=False):
 		self.ignore = []
 		self.ambigousTypes = ['LinphonePayloadType']
+		# C++ container of the bctbx_list_t and string arrays, 'list' or 'vector'
+		self.listContainer = listContainer
+		self.listConverterSuffix = 'List' if listContainer == 'list' else 'Vector'
+		# Whether the lists of objects returned by the methods of the classes
+		# are ObjectListRange, which wrap the elements on iteration
+		self.lazyLists = lazyLists
+	
+	def is_lazy_list(self, _type):
+		return self.lazyLists and type(_type.parent) is AbsApi.Method \
+			and type(_type.containedTypeDesc) is AbsApi.ClassType \
+			and _type.containedTypeDesc.desc is not None and _type.containedTypeDesc.desc.refcountable \
+			and _type.find_first_ancestor_by_type(AbsApi.Interface) is None
 	
 	def is_ambigous_type(self, _type):
 		return _type.name in self.ambigousTypes or (_type.name == 'list' and self.is_ambigous_type(_type.containedTypeDesc))
@@ -322,7 +337,7 @@ class CppTranslator(object):
 			if exprtype.name == 'string':
 				return 'StringUtilities::cStringToCpp({0})'.format(cExpr)
 			elif exprtype.name == 'string_array':
-				return 'StringUtilities::cStringArrayToCppList({0})'.format(cExpr)
+				return 'StringUtilities::cStringArrayToCpp{0}({1})'.format(self.listConverterSuffix, cExpr)
 			elif exprtype.name == 'boolean':
 				return '({0} != FALSE)'.format(cExpr)
 			else:
@@ -349,15 +364,20 @@ class CppTranslator(object):
 						cExpr)
 		elif type(exprtype) is AbsApi.ListType:
 			if type(exprtype.containedTypeDesc) is AbsApi.BaseType and exprtype.containedTypeDesc.name == 'string':
-				return 'StringBctbxListWrapper::bctbxListToCppList({0})'.format(cExpr)
+				return 'StringBctbxListWrapper::bctbxListToCpp{0}({1})'.format(self.listConverterSuffix, cExpr)
 			elif type(exprtype.containedTypeDesc) is AbsApi.ClassType:
 				cppReturnType = self.translate_class_type(exprtype.containedTypeDesc, namespace=usedNamespace)
 				if exprtype.containedTypeDesc.desc.refcountable:
 					cppReturnType = CppTranslator.sharedPtrTypeExtractor.match(cppReturnType).group(2)
-					return 'ObjectBctbxListWrapper<{0}>::bctbxListToCppList({1})'.format(cppReturnType, cExpr)
+					if self.is_lazy_list(exprtype):
+						method = exprtype.parent
+						_class = method.find_first_ancestor_by_type(AbsApi.Class)
+						owner = 'shared_from_this()' if method.type == AbsApi.Method.Type.Instance and _class.refcountable else 'nullptr'
+						return 'ObjectBctbxListWrapper<{0}>::bctbxListToCppRange({1}, {2})'.format(cppReturnType, owner, cExpr)
+					return 'ObjectBctbxListWrapper<{0}>::bctbxListToCpp{1}({2})'.format(cppReturnType, self.listConverterSuffix, cExpr)
 				else:
 					cType = exprtype.containedTypeDesc.desc.name.to_c()
-					return 'StructBctbxListWrapper<{0},{1}>::bctbxListToCppList({2})'.format(cppReturnType, cType, cExpr)
+					return 'StructBctbxListWrapper<{0},{1}>::bctbxListToCpp{2}({3})'.format(cppReturnType, cType, self.listConverterSuffix, cExpr)
 			else:
 				raise AbsApi.Error('translation of bctbx_list_t of enums or basic C types is not supported')
 		else:
@@ -412,7 +432,7 @@ class CppTranslator(object):
 			if type(_type.parent) is AbsApi.Argument:
 				res += ' &'
 		elif _type.name == 'string_array':
-			res = 'std::list<std::string>'
+			res = 'std::{0}<std::string>'.format(self.listContainer)
 			if type(_type.parent) is AbsApi.Argument:
 				res += ' &'
 		else:
@@ -482,11 +502,13 @@ class CppTranslator(object):
 			res = self.translate_type(_type.containedTypeDesc)
 		else:
 			res = self.translate_type(_type.containedTypeDesc, **params)
+			if self.is_lazy_list(_type):
+				return 'ObjectListRange<{0}>'.format(CppTranslator.sharedPtrTypeExtractor.match(res).group(2))
 			
 		if type(_type.parent) is AbsApi.Argument:
-			return 'const std::list<{0} > &'.format(res)
+			return 'const std::{0}<{1} > &'.format(self.listContainer, res)
 		else:
-			return 'std::list<{0} >'.format(res)
+			return 'std::{0}<{1} >'.format(self.listContainer, res)
 	
 	@staticmethod
 	def translate_name(aName, **params):
@@ -581,24 +603,21 @@ class ClassHeader(object):
 		self.priorDeclarations = []
 		self.private_type = _class.name.to_camel_case(fullName=True)
 		
+		self.listContainer = translator.listContainer
 		self.includes = {'internal': [], 'external': []}
 		includes = self.needed_includes(_class)
 		for include in includes['internal']:
-			if _class.name.to_camel_case(fullName=True) == 'LinphoneCore' or (isinstance(_class, AbsApi.Interface) and _class.listenedClass is not None and include == _class.listenedClass.name.to_snake_case()):
-				if include == 'enums':
-					self.includes['internal'].append({'name': include})
-				else:
-					className = AbsApi.ClassName()
-					className.from_snake_case(include)
-					self.priorDeclarations.append({'name': className.to_camel_case()})
-			else:
-				self.includes['internal'].append({'name': include})
-		
+			self.includes['internal'].append({'name': include})
 		for include in includes['external']:
 			self.includes['external'].append({'name': include})
+		for declaration in includes['declarations']:
+			self.priorDeclarations.append({'name': declaration})
 	
 	def needed_includes(self, _class):
-		includes = {'internal': [], 'external': []}
+		# The classes only referred to through std::shared_ptr are forward
+		# declared, the header of a class is included only when its full type
+		# is needed, ie. when it is passed or returned by value
+		includes = {'internal': [], 'external': [], 'declarations': []}
 		
 		if type(_class) is AbsApi.Class:
 			for _property in _class.properties:
@@ -618,11 +637,20 @@ class ClassHeader(object):
 				self._needed_includes_from_type(arg.type, includes)
 		
 		if isinstance(_class, AbsApi.Class) and _class.listenerInterface is not None:
-			self._add_include(includes, 'internal', _class.listenerInterface.name.to_snake_case())
+			self._add_include(includes, 'external', 'memory')
+			self._add_include(includes, 'declarations', CppTranslator.translate_class_name(_class.listenerInterface.name))
+		
+		if _class.name.to_c() == 'LinphoneFactory':
+			# Classes of the hand-written methods of the factory
+			self._add_include(includes, 'declarations', 'Core')
+			self._add_include(includes, 'declarations', 'CoreListener')
 		
 		currentClassInclude = _class.name.to_snake_case()
 		if currentClassInclude in includes['internal']:
 			includes['internal'].remove(currentClassInclude)
+		currentClassDeclaration = CppTranslator.translate_class_name(_class.name)
+		if currentClassDeclaration in includes['declarations']:
+			includes['declarations'].remove(currentClassDeclaration)
 			
 		return includes
 	
@@ -633,9 +661,14 @@ class ClassHeader(object):
 	
 	def _needed_includes_from_type(self, _type, includes):
 		if isinstance(_type, AbsApi.ClassType):
-			self._add_include(includes, 'external', 'memory')
 			if _type.desc is not None:
-				self._add_include(includes, 'internal', _type.desc.name.to_snake_case())
+				if _type.desc.refcountable:
+					self._add_include(includes, 'external', 'memory')
+					self._add_include(includes, 'declarations', CppTranslator.translate_class_name(_type.desc.name))
+				else:
+					self._add_include(includes, 'internal', _type.desc.name.to_snake_case())
+			else:
+				self._add_include(includes, 'external', 'memory')
 		elif isinstance(_type, AbsApi.EnumType):
 			self._add_include(includes, 'internal', 'enums')
 		elif isinstance(_type, AbsApi.BaseType):
@@ -643,8 +676,11 @@ class ClassHeader(object):
 				self._add_include(includes, 'external', 'cstdint')
 			elif _type.name == 'string':
 				self._add_include(includes, 'external', 'string')
+			elif _type.name == 'string_array':
+				self._add_include(includes, 'external', self.listContainer)
+				self._add_include(includes, 'external', 'string')
 		elif isinstance(_type, AbsApi.ListType):
-			self._add_include(includes, 'external', 'list')
+			self._add_include(includes, 'external', self.listContainer)
 			self._needed_includes_from_type(_type.containedTypeDesc, includes)
 	
 	def _add_include(self, includes, location, name):
@@ -667,69 +703,173 @@ class ClassImpl(object):
 		self.namespace = 'linphone'
 
 class GenWrapper(object):
-	def __init__(self, includedir, srcdir, xmldir):
+	def __init__(self, includedir, srcdir, xmldir, listContainer='list', lazyLists=False, profile=None):
 		self.includedir = includedir
 		self.srcdir = srcdir
+		self.jobs = 1
+		self.profile = profile if profile is not None else profiling.NoProfile()
 
-		project = CApi.Project()
-		project.initFromDir(xmldir)
-		project.check()
+		if os.path.isfile(xmldir):
+			# Compiled API model written by genapixml.py --model
+			with self.profile.phase('model load'):
+				project = CApi.loadProject(xmldir)
+		else:
+			project = CApi.Project()
+			with self.profile.phase('xml parse'):
+				project.readDir(xmldir)
+			with self.profile.phase('class discovery'):
+				project.discoverClasses()
+			with self.profile.phase('check'):
+				project.check()
 		
 		self.parser = AbsApi.CParser(project)
-		self.parser.parse_all()
-		self.translator = CppTranslator()
-		self.renderer = pystache.Renderer()	
+		with self.profile.phase('abstract parse'):
+			self.parser.parse_enums_and_classes()
+		with self.profile.phase('type fixing'):
+			self.parser.fix_all_types()
+		self.translator = CppTranslator(listContainer, lazyLists)
+		self.renderer = templatecache.CachedRenderer()	
 		self.mainHeader = MainHeader()
 		self.impl = ClassImpl()
 
 	def render_all(self):
 		header = EnumsHeader(self.translator)
-		for item in self.parser.enumsIndex.items():
-			if item[1] is not None:
-				header.add_enum(item[1])
-			else:
-				print('warning: {0} enum won\'t be translated because of parsing errors'.format(item[0]))
+		with self.profile.phase('translation'):
+			for item in self.parser.enumsIndex.items():
+				if item[1] is not None:
+					header.add_enum(item[1])
+				else:
+					print('warning: {0} enum won\'t be translated because of parsing errors'.format(item[0]))
 		
 		self.render(header, self.includedir + '/enums.hh')
 		self.mainHeader.add_include('enums.hh')
 		
-		for _class in self.parser.interfacesIndex.values():
-			self.render_header(_class)
-		for _class in self.parser.classesIndex.values():
-			self.render_header(_class)
+		classes = list(self.parser.interfacesIndex.values()) + list(self.parser.classesIndex.values())
+		for result in self.__render_headers(classes):
+			self.__add_header(*result)
 		
 		self.render(self.mainHeader, self.includedir + '/linphone.hh')
 		self.render(self.impl, self.srcdir + '/linphone++.cc')
+		with self.profile.phase('file write'):
+			self.__update_manifest([include['name'] for include in self.mainHeader.includes] + ['linphone.hh'])
+
+	def __update_manifest(self, headers):
+		# The manifest lists the headers written by the previous run, so that
+		# the ones of the classes which have disappeared can be removed
+		path = self.srcdir + '/headers.manifest'
+		previous = _read_text(path)
+		if previous is not None:
+			for header in set(previous.splitlines()) - set(headers):
+				try:
+					os.unlink(self.includedir + '/' + header)
+				except OSError as e:
+					if e.errno != errno.ENOENT:
+						raise
+		_write_if_changed(path, u''.join(header + u'\n' for header in headers))
+
+	def __render_headers(self, classes):
+		# The results come back in the order of the classes whatever the
+		# number of processes, so that linphone.hh and linphone++.cc do not change
+		if self.jobs == 1 or len(classes) < 2:
+			return [self.render_class_header(_class) for _class in classes]
+		jobs = self.jobs
+		if jobs <= 0:
+			jobs = multiprocessing.cpu_count()
+		pool = multiprocessing.Pool(min(jobs, len(classes)), _init_header_worker, (self, classes))
+		try:
+			results = []
+			for result, phases in pool.map(_render_class_header, range(len(classes))):
+				self.profile.merge(phases)
+				results.append(result)
+			return results
+		finally:
+			pool.close()
+			pool.join()
+
+	def __add_header(self, headerName, translatedClass, error):
+		if error is not None:
+			print(error)
+		elif headerName is not None:
+			self.mainHeader.add_include(headerName)
+			if translatedClass is not None:
+				self.impl.classes.append(translatedClass)
 
 	def render(self, item, path):
-		tmppath = path + '.tmp'
-		content = ''
-		with open(tmppath, mode='w') as f:
-			f.write(self.renderer.render(item))
-		with open(tmppath, mode='rU') as f:
-			content = f.read()
-		with open(path, mode='w') as f:
-			f.write(content)
-		os.unlink(tmppath)
+		# Newlines are normalized as reading the file back in universal
+		# newlines mode would
+		with self.profile.phase('template render'):
+			content = self.renderer.render(item).replace('\r\n', '\n').replace('\r', '\n')
+		with self.profile.phase('file write'):
+			return _write_if_changed(path, content)
 
-	def render_header(self, _class):
-		if _class is not None:
-			try:
+	def render_class_header(self, _class):
+		# Returns (header name, translated class, error message)
+		if _class is None:
+			return (None, None, None)
+		try:
+			with self.profile.phase('translation'):
 				header = ClassHeader(_class, self.translator)
-				headerName = _class.name.to_snake_case() + '.hh'
-				self.mainHeader.add_include(headerName)
-				self.render(header, self.includedir + '/' + header.filename)
-				
-				if type(_class) is not AbsApi.Interface:
-					self.impl.classes.append(header._class)
-				
-			except AbsApi.Error as e:
-				print('Could not translate {0}: {1}'.format(_class.name.to_camel_case(fullName=True), e.args[0]))
+			headerName = _class.name.to_snake_case() + '.hh'
+			self.render(header, self.includedir + '/' + header.filename)
+			translatedClass = header._class if type(_class) is not AbsApi.Interface else None
+			return (headerName, translatedClass, None)
+		except AbsApi.Error as e:
+			return (None, None, 'Could not translate {0}: {1}'.format(_class.name.to_camel_case(fullName=True), e.args[0]))
+
+	def render_header(self, _class):
+		self.__add_header(*self.render_class_header(_class))
+
+
+def _read_text(path):
+	try:
+		with io.open(path, mode='r', encoding='utf-8') as f:
+			return f.read()
+	except (IOError, OSError, UnicodeDecodeError):
+		return None
+
+def _write_if_changed(path, content):
+	# An unchanged file keeps its modification time, so that the C++ files
+	# depending on it are not compiled again
+	previous = _read_text(path)
+	if previous == content:
+		return False
+	tmppath = path + '.tmp'
+	with open(tmppath, mode='w') as f:
+		f.write(content)
+	_replace(tmppath, path)
+	return True
+
+def _replace(src, dst):
+	if hasattr(os, 'replace'):
+		os.replace(src, dst)
+	else:
+		if os.name == 'nt' and os.path.exists(dst):
+			os.unlink(dst)
+		os.rename(src, dst)
+
+
+_headerWorker = None
+
+def _init_header_worker(genwrapper, classes):
+	global _headerWorker
+	genwrapper.profile = genwrapper.profile.worker()
+	_headerWorker = (genwrapper, classes)
+
+def _render_class_header(index):
+	# Render one class header in a process pool when jobs != 1, and send the
+	# time spent in each phase back along with the result
+	genwrapper, classes = _headerWorker
+	result = genwrapper.render_class_header(classes[index])
+	return (result, genwrapper.profile.take())
 
 def main():
 	argparser = argparse.ArgumentParser(description='Generate source files for the C++ wrapper')
-	argparser.add_argument('xmldir', type=str, help='Directory where the XML documentation of the Linphone\'s API generated by Doxygen is placed')
+	argparser.add_argument('xmldir', type=str, help='Directory where the XML documentation of the Linphone\'s API generated by Doxygen is placed, or API model file written by genapixml.py --model')
 	argparser.add_argument('-o --output', type=str, help='the directory where to generate the source files', dest='outputdir', default='.')
+	argparser.add_argument('--list-container', choices=['list', 'vector'], default='list', help="C++ container of the lists returned and taken by the wrapper. std::vector is filled in one allocation but changes the API")
+	argparser.add_argument('--lazy-lists', action='store_true', help="Return the lists of objects as ObjectListRange, which wrap the elements into C++ objects while they are iterated instead of copying the whole list")
+	argparser.add_argument('-j', '--jobs', metavar='N', type=int, default=1, help="Number of processes used to render the class headers (0 to use all the CPUs)")
+	argparser.add_argument('--profile', metavar='reportfile', help="Write the time spent in each phase and the peak memory to this JSON file ('-' for the standard error)")
 	args = argparser.parse_args()
 	
 	includedir = args.outputdir + '/include/linphone++'
@@ -749,8 +889,12 @@ def main():
 			print("Cannot create '{0}' dircetory: {1}".format(srcdir, e.strerror))
 			sys.exit(1)
 	
-	genwrapper = GenWrapper(includedir, srcdir, args.xmldir)
+	profile = profiling.Profile('genwrapper') if args.profile is not None else None
+	genwrapper = GenWrapper(includedir, srcdir, args.xmldir, listContainer=args.list_container, lazyLists=args.lazy_lists, profile=profile)
+	genwrapper.jobs = args.jobs
 	genwrapper.render_all()
+	if profile is not None:
+		profile.write(args.profile)
 
 
 if __name__ == '__main__':
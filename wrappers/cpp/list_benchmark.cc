@@ -0,0 +1,94 @@
+/*
+list_benchmark.cc
+Copyright (C) 2017 Belledonne Communications SARL
+
+This program is free software; you can redistribute it and/or
+modify it under the terms of the GNU General Public License
+as published by the Free Software Foundation; either version 2
+of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+*/
+
+/*
+ * Measures the conversions between bctbx_list_t and the C++ containers done
+ * by the wrapper, eg. in Core::getCallLogs(), for both values of the
+ * --list-container option of genwrapper.py and with --lazy-lists.
+ *
+ * Usage: linphone++-list-benchmark [number of elements] [number of runs]
+ */
+
+#include <chrono>
+#include <cstdio>
+#include <cstdlib>
+#include <bctoolbox/port.h>
+#include <linphone/linphonecore.h>
+#include "linphone++/linphone.hh"
+#include "tools.hh"
+
+using namespace linphone;
+using namespace std;
+
+
+template <class F>
+static double bestRun(int runs, F func) {
+	double best = 0;
+	for (int i = 0; i < runs; i++) {
+		auto start = chrono::steady_clock::now();
+		func();
+		double elapsed = chrono::duration<double, micro>(chrono::steady_clock::now() - start).count();
+		if (i == 0 || elapsed < best) best = elapsed;
+	}
+	return best;
+}
+
+int main(int argc, char *argv[]) {
+	int count = (argc > 1) ? atoi(argv[1]) : 5000;
+	int runs = (argc > 2) ? atoi(argv[2]) : 100;
+	bctbx_list_t *addresses = NULL;
+	bctbx_list_t *strings = NULL;
+	for (int i = count - 1; i >= 0; i--) {
+		char *uri = bctbx_strdup_printf("sip:user%d@sip.example.org", i);
+		addresses = bctbx_list_prepend(addresses, linphone_address_new(uri));
+		strings = bctbx_list_prepend(strings, uri);
+	}
+
+	// The C++ objects are created once, as they would be by a previous call
+	// of the getter, so that only the work on the containers is measured
+	list<shared_ptr<Address>> objectList = ObjectBctbxListWrapper<Address>::bctbxListToCppList((const bctbx_list_t *)addresses);
+	vector<shared_ptr<Address>> objectVector(objectList.cbegin(), objectList.cend());
+	list<string> stringList = StringBctbxListWrapper::bctbxListToCppList(strings);
+	vector<string> stringVector(stringList.cbegin(), stringList.cend());
+	size_t size = 0;
+
+	printf("%d elements, best of %d runs, in microseconds\n", count, runs);
+	printf("                          std::list  std::vector\n");
+	printf("objects, C to C++    %14.1f %12.1f\n",
+		bestRun(runs, [&]() {size += ObjectBctbxListWrapper<Address>::bctbxListToCppList((const bctbx_list_t *)addresses).size();}),
+		bestRun(runs, [&]() {size += ObjectBctbxListWrapper<Address>::bctbxListToCppVector((const bctbx_list_t *)addresses).size();}));
+	printf("objects, C to C++ as an ObjectListRange: %.1f to iterate, %.1f to get the first element\n",
+		bestRun(runs, [&]() {for (const shared_ptr<Address> &address : ObjectBctbxListWrapper<Address>::bctbxListToCppRange(nullptr, (const bctbx_list_t *)addresses)) size += (address != nullptr);}),
+		bestRun(runs, [&]() {size += (*ObjectBctbxListWrapper<Address>::bctbxListToCppRange(nullptr, (const bctbx_list_t *)addresses).begin() != nullptr);}));
+	printf("objects, C++ to C    %14.1f %12.1f\n",
+		bestRun(runs, [&]() {size += bctbx_list_size(ObjectBctbxListWrapper<Address>(objectList).c_list());}),
+		bestRun(runs, [&]() {size += bctbx_list_size(ObjectBctbxListWrapper<Address>(objectVector).c_list());}));
+	printf("strings, C to C++    %14.1f %12.1f\n",
+		bestRun(runs, [&]() {size += StringBctbxListWrapper::bctbxListToCppList(strings).size();}),
+		bestRun(runs, [&]() {size += StringBctbxListWrapper::bctbxListToCppVector(strings).size();}));
+	printf("strings, C++ to C    %14.1f %12.1f\n",
+		bestRun(runs, [&]() {size += bctbx_list_size(StringBctbxListWrapper(stringList).c_list());}),
+		bestRun(runs, [&]() {size += bctbx_list_size(StringBctbxListWrapper(stringVector).c_list());}));
+
+	objectList.clear();
+	objectVector.clear();
+	bctbx_list_free_with_data(addresses, (bctbx_list_free_func)linphone_address_unref);
+	bctbx_list_free_with_data(strings, bctbx_free);
+	return (size > 0) ? 0 : 1;
+}
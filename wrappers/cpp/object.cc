@@ -18,6 +18,7 @@ Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 */
 
 #include "object.hh"
+#include <bctoolbox/list.h>
 #include <bctoolbox/port.h>
 #include <belle-sip/object.h>
 #include <cstring>
@@ -77,6 +78,19 @@ linphone::Object *linphone::Object::getBackPtrFromCPtr(const void *ptr) {
 }
 
 
+const void *BctbxListNode::next(const void *node) {
+	return ((const ::bctbx_list_t *)node)->next;
+}
+
+void *BctbxListNode::data(const void *node) {
+	return ((const ::bctbx_list_t *)node)->data;
+}
+
+void BctbxListNode::free(const void *list) {
+	bctbx_list_free((::bctbx_list_t *)list);
+}
+
+
 std::string ListenableObject::sListenerDataName = "cpp_listener";
 
 ListenableObject::ListenableObject(void *ptr, bool takeRef): Object(ptr, takeRef) {
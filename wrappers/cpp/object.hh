@@ -20,6 +20,8 @@ Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 #ifndef _LINPHONE_OBJECT_HH
 #define _LINPHONE_OBJECT_HH
 
+#include <cstddef>
+#include <iterator>
 #include <memory>
 #include <list>
 #include <map>
@@ -152,6 +154,60 @@ namespace linphone {
 		static std::string sListenerListName;
 	};
 	
+	
+	class BctbxListNode {
+	public:
+		LINPHONECXX_PUBLIC static const void *next(const void *node);
+		LINPHONECXX_PUBLIC static void *data(const void *node);
+		LINPHONECXX_PUBLIC static void free(const void *list);
+	};
+	
+	/*
+	 * List of objects returned by the C API, which is walked without copy.
+	 * The C++ object of an element is only created or looked up when the
+	 * iterator is dereferenced. The range keeps the object it comes from
+	 * alive, and must not be used once the list has been modified by that
+	 * object.
+	 */
+	template <class T>
+	class ObjectListRange {
+	public:
+		class iterator {
+		public:
+			typedef std::forward_iterator_tag iterator_category;
+			typedef std::shared_ptr<T> value_type;
+			typedef std::ptrdiff_t difference_type;
+			typedef const std::shared_ptr<T> *pointer;
+			typedef std::shared_ptr<T> reference;
+			
+			iterator(const void *node=NULL): mNode(node) {}
+			std::shared_ptr<T> operator*() const {return Object::cPtrToSharedPtr<T>(BctbxListNode::data(mNode));}
+			iterator &operator++() {mNode = BctbxListNode::next(mNode); return *this;}
+			iterator operator++(int) {iterator it = *this; mNode = BctbxListNode::next(mNode); return it;}
+			bool operator==(const iterator &other) const {return mNode == other.mNode;}
+			bool operator!=(const iterator &other) const {return mNode != other.mNode;}
+			
+		private:
+			const void *mNode;
+		};
+		
+		ObjectListRange(const std::shared_ptr<const Object> &owner, const void *cList, bool freeList):
+			mOwner(owner),
+			mList(cList, freeList ? BctbxListNode::free : noFree) {}
+		
+		iterator begin() const {return iterator(mList.get());}
+		iterator end() const {return iterator();}
+		bool empty() const {return mList.get() == NULL;}
+		operator std::list<std::shared_ptr<T> >() const {return std::list<std::shared_ptr<T> >(begin(), end());}
+	
+	private:
+		static void noFree(const void *list) {}
+	
+	private:
+		std::shared_ptr<const Object> mOwner;
+		std::shared_ptr<const void> mList;
+	};
+	
 };
 
 #endif // _LINPHONE_OBJECT_HH
@@ -25,12 +25,24 @@ using namespace linphone;
 using namespace std;
 
 
-StringBctbxListWrapper::StringBctbxListWrapper(const std::list<std::string> &cppList): AbstractBctbxListWrapper() {
-	for(auto it=cppList.cbegin(); it!=cppList.cend(); it++) {
+template <class C>
+static ::bctbx_list_t *cppStringsToBctbxList(const C &cppList) {
+	// Prepending from the end avoids walking the list at each append
+	::bctbx_list_t *cList = NULL;
+	for(auto it=cppList.crbegin(); it!=cppList.crend(); it++) {
 		char *buffer = (char *)malloc(it->length()+1);
 		strcpy(buffer, it->c_str());
-		mCList = bctbx_list_append(mCList, buffer);
+		cList = bctbx_list_prepend(cList, buffer);
 	}
+	return cList;
+}
+
+StringBctbxListWrapper::StringBctbxListWrapper(const std::list<std::string> &cppList): AbstractBctbxListWrapper() {
+	mCList = cppStringsToBctbxList(cppList);
+}
+
+StringBctbxListWrapper::StringBctbxListWrapper(const std::vector<std::string> &cppVector): AbstractBctbxListWrapper() {
+	mCList = cppStringsToBctbxList(cppVector);
 }
 
 StringBctbxListWrapper::~StringBctbxListWrapper() {
@@ -45,6 +57,15 @@ list<string> StringBctbxListWrapper::bctbxListToCppList(const ::bctbx_list_t *bc
 	return cppList;
 }
 
+vector<string> StringBctbxListWrapper::bctbxListToCppVector(const ::bctbx_list_t *bctbxList) {
+	vector<string> cppVector;
+	cppVector.reserve(bctbx_list_size(bctbxList));
+	for(const ::bctbx_list_t *it=bctbxList; it!=NULL; it=it->next) {
+		cppVector.emplace_back((char *)it->data);
+	}
+	return cppVector;
+}
+
 std::string StringUtilities::cStringToCpp(const char *cstr) {
 	if (cstr == NULL) {
 		return std::string();
@@ -79,3 +100,14 @@ std::list<std::string> StringUtilities::cStringArrayToCppList(const char **cArra
 	}
 	return cppList;
 }
+
+std::vector<std::string> StringUtilities::cStringArrayToCppVector(const char **cArray) {
+	vector<string> cppVector;
+	int i;
+	for(i=0; cArray[i]!=NULL; i++);
+	cppVector.reserve(i);
+	for(i=0; cArray[i]!=NULL; i++) {
+		cppVector.emplace_back(cArray[i]);
+	}
+	return cppVector;
+}
@@ -24,6 +24,7 @@ Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 #include <belle-sip/object.h>
 #include <list>
 #include <memory>
+#include <vector>
 #include "object.hh"
 
 namespace linphone {
@@ -42,7 +43,8 @@ namespace linphone {
 	template <class T>
 	class ObjectBctbxListWrapper: public AbstractBctbxListWrapper {
 	public:
-		ObjectBctbxListWrapper(const std::list<std::shared_ptr<T> > &cppList) {
+		template <class C>
+		ObjectBctbxListWrapper(const C &cppList) {
 			mCList = cppListToBctbxList(cppList);
 		}
 		virtual ~ObjectBctbxListWrapper() {
@@ -63,12 +65,33 @@ namespace linphone {
 			bctbx_list_free(bctbxList);
 			return cppList;
 		}
-		static ::bctbx_list_t *cppListToBctbxList(const std::list<std::shared_ptr<T> > &cppList) {
+		static std::vector<std::shared_ptr<T> > bctbxListToCppVector(const ::bctbx_list_t *bctbxList) {
+			std::vector<std::shared_ptr<T> > cppVector;
+			cppVector.reserve(bctbx_list_size(bctbxList));
+			for(const ::bctbx_list_t *it=bctbxList; it!=NULL; it=it->next) {
+				cppVector.push_back(Object::cPtrToSharedPtr<T>(it->data));
+			}
+			return cppVector;
+		}
+		static std::vector<std::shared_ptr<T>> bctbxListToCppVector(::bctbx_list_t *bctbxList) {
+			std::vector<std::shared_ptr<T>> cppVector = bctbxListToCppVector((const ::bctbx_list_t *)bctbxList);
+			bctbx_list_free(bctbxList);
+			return cppVector;
+		}
+		static ObjectListRange<T> bctbxListToCppRange(const std::shared_ptr<const Object> &owner, const ::bctbx_list_t *bctbxList) {
+			return ObjectListRange<T>(owner, bctbxList, false);
+		}
+		static ObjectListRange<T> bctbxListToCppRange(const std::shared_ptr<const Object> &owner, ::bctbx_list_t *bctbxList) {
+			return ObjectListRange<T>(owner, bctbxList, true);
+		}
+		template <class C>
+		static ::bctbx_list_t *cppListToBctbxList(const C &cppList) {
+			// Prepending from the end avoids walking the list at each append
 			bctbx_list_t *cList = NULL;
-			for(auto it=cppList.cbegin(); it!=cppList.cend(); it++) {
+			for(auto it=cppList.crbegin(); it!=cppList.crend(); it++) {
 				::belle_sip_object_t *cPtr = (::belle_sip_object_t *)Object::sharedPtrToCPtr(std::static_pointer_cast<Object,T>(*it));
 				if (cPtr != NULL) belle_sip_object_ref(cPtr);
-				cList = bctbx_list_append(cList, cPtr);
+				cList = bctbx_list_prepend(cList, cPtr);
 			}
 			return cList;
 		}
@@ -83,15 +106,18 @@ namespace linphone {
 	class StringBctbxListWrapper: public AbstractBctbxListWrapper {
 	public:
 		StringBctbxListWrapper(const std::list<std::string> &cppList);
+		StringBctbxListWrapper(const std::vector<std::string> &cppVector);
 		virtual ~StringBctbxListWrapper();
 		static std::list<std::string> bctbxListToCppList(const ::bctbx_list_t *bctbxList);
+		static std::vector<std::string> bctbxListToCppVector(const ::bctbx_list_t *bctbxList);
 	};
 	
 	
 	template <class T, class U>
 	class StructBctbxListWrapper: public AbstractBctbxListWrapper {
 	public:
-		StructBctbxListWrapper(const std::list<T> &cppList): AbstractBctbxListWrapper() {
+		template <class C>
+		StructBctbxListWrapper(const C &cppList): AbstractBctbxListWrapper() {
 			mCList = cppListToBctbxList(cppList);
 		}
 		virtual ~StructBctbxListWrapper() {
@@ -104,10 +130,19 @@ namespace linphone {
 			}
 			return cppList;
 		}
-		static bctbx_list_t *cppListToBctbxList(const std::list<T> &cppList) {
+		static std::vector<T> bctbxListToCppVector(const ::bctbx_list_t *bctbxList) {
+			std::vector<T> cppVector;
+			cppVector.reserve(bctbx_list_size(bctbxList));
+			for(const bctbx_list_t *it = bctbx_list_first_elem(bctbxList); it != NULL; it = bctbx_list_next(it)) {
+				cppVector.emplace_back(it->data);
+			}
+			return cppVector;
+		}
+		template <class C>
+		static bctbx_list_t *cppListToBctbxList(const C &cppList) {
 			bctbx_list_t *cList = NULL;
-			for(auto it=cppList.cbegin(); it!=cppList.cend(); it++) {
-				cList = bctbx_list_append(cList, new U(it->c_struct()));
+			for(auto it=cppList.crbegin(); it!=cppList.crend(); it++) {
+				cList = bctbx_list_prepend(cList, new U(it->c_struct()));
 			}
 			return cList;
 		}
@@ -122,6 +157,7 @@ namespace linphone {
 		static std::string cStringToCpp(char *cstr);
 		static const char *cppStringToC(const std::string &cppstr);
 		static std::list<std::string> cStringArrayToCppList(const char **cArray);
+		static std::vector<std::string> cStringArrayToCppVector(const char **cArray);
 	};
 	
 	template <class T>